@@ -1,8 +1,11 @@
 import os
 import json
+import time
+from datetime import datetime
 from typing import Dict, Any
 
 from ..common.validation_helper.validation_execution import ValidatorExecution
+from ..common.validation_helper.core.rule_profiler import RuleProfiler
 from ..common.aria_helper.boto3_utils import get_secret
 from ..common.aria_helper.mongo_utils import Mongo
 from ..common.aria_helper.aria_utils import ARIA
@@ -11,6 +14,25 @@ database_name = os.environ.get('DATABASE_NAME')
 aria_environment = os.environ.get('ARIA_ENVIRONMENT')
 common_prefix = os.environ.get('COMMON_PREFIX')
 process_name = os.environ.get('PROCESS_NAME')
+validation_config_ttl = int(os.environ.get('VALIDATION_CONFIG_TTL_SECONDS', 300))
+validation_profiling = os.environ.get('VALIDATION_PROFILING', 'false').lower() == 'true'
+
+# Process-level state reused across warm invocations
+mongo_client = None
+validation_config_cache = {}  # app_id -> {"rule_index", "version", "expires_at"}
+
+
+def get_mongo_client():
+    """Returns the Mongo client, created once per container."""
+    global mongo_client
+    if mongo_client is None:
+        mongo_client = Mongo(get_secret(f'{common_prefix}-mongodb_uri', return_json=False)).client
+    return mongo_client
+
+
+def get_config_version(validation_config: Dict[str, Any]) -> Any:
+    """Returns the version marker of a validation config ('version', falling back to 'updated_at')."""
+    return validation_config.get('version', validation_config.get('updated_at'))
 
 
 class BreValidationHandler:
@@ -34,19 +56,64 @@ class BreValidationHandler:
         self.ocr_groups = self.document.get('ocr_groups', [])
         self.request_response = self.input_body.get('request_response', False)
 
+        if not self.app_id:
+            raise ValueError("app_id is missing from the document")
+
         # Initialize clients and configurations
-        self.mongo_client = Mongo(get_secret(f'{common_prefix}-mongodb_uri', return_json=False)).client
         self.validator_execution = ValidatorExecution() # Correct class name
+        if validation_profiling:
+            self.validator_execution.validation_engine.profiler = RuleProfiler()
         self.aria_secret = get_secret(secret_name=f'{common_prefix}-aria_cm_tokens')
-        self.validation_config = self.mongo_client[database_name][f"validation_config"].find_one({
-            "app_id": self.app_id
-        })
+        self.rule_index = self.get_rule_index()
+
+    def get_rule_index(self):
+        """
+        Returns the compiled rules of the app's validation config.
+        Warm invocations reuse the cached rules until the TTL expires; after that, the stored
+        version/updated_at is checked and the config is only reloaded and recompiled if it changed.
+        """
+        cached = validation_config_cache.get(self.app_id)
+        now = time.monotonic()
+        if cached and now < cached["expires_at"]:
+            return cached["rule_index"]
 
-        if not self.validation_config:
+        collection = get_mongo_client()[database_name]["validation_config"]
+        if cached and cached["version"] is not None:
+            current = collection.find_one({"app_id": self.app_id}, {"version": 1, "updated_at": 1})
+            if current and get_config_version(current) == cached["version"]:
+                cached["expires_at"] = now + validation_config_ttl
+                return cached["rule_index"]
+
+        validation_config = collection.find_one({"app_id": self.app_id})
+        if not validation_config:
+            validation_config_cache.pop(self.app_id, None)
             raise ValueError(f"No validation config found for app_id: {self.app_id}")
 
-        if not self.app_id:
-            raise ValueError("app_id is missing from the document")
+        print(f"Loading validation config for app_id: {self.app_id}")
+        rule_index = self.validator_execution.compile_config(validation_config)
+        validation_config_cache[self.app_id] = {
+            "rule_index": rule_index,
+            "version": get_config_version(validation_config),
+            "expires_at": now + validation_config_ttl
+        }
+        return rule_index
+
+    def save_rule_profile(self):
+        """Stores the per-rule timings of this invocation in the validation_profile collection."""
+        profiler = self.validator_execution.validation_engine.profiler
+        if profiler is None:
+            return
+
+        try:
+            get_mongo_client()[database_name]["validation_profile"].insert_one({
+                "app_id": self.app_id,
+                "document_id": self.document_id,
+                "created_at": datetime.utcnow(),
+                "rules": profiler.summary()
+            })
+        except Exception as e:
+            # Profiling must never fail the validation itself
+            print(f"WARNING: Failed to save validation profile for document_id {self.document_id}. Reason: {str(e)}")
 
     def post_to_aria(self, bre_response: Dict[str, Any]):
         """Posts the validation result back to the ARIA system."""
@@ -74,7 +141,8 @@ class BreValidationHandler:
         try:
             print(f"Starting validation for document_id: {self.document_id}")
             # Perform validation
-            is_valid, validation_result = self.validator_execution.validate_data(self.document, self.validation_config)
+            is_valid, validation_result = self.validator_execution.validate_data(self.document, self.rule_index)
+            self.save_rule_profile()
             
             # Prepare the payload for the ARIA system
             aria_update_request = {k: v["fields"] for k, v in validation_result["groups"].items()}
@@ -0,0 +1,37 @@
+from types import CodeType
+from typing import List, Optional, Tuple
+
+
+class CompiledExpression:
+    """
+    Validation expression compiled once into a reusable code object.
+
+    Field references in the source are rewritten into named variable slots, so at
+    run time only the values are bound; the expression is never re-parsed.
+    """
+
+    def __init__(self, source: str, code: Optional[CodeType] = None,
+                 slots: List[Tuple[str, Optional[str]]] = None, error: Exception = None, vector_plan=None):
+        """
+        Args:
+            source: Original expression as written in validation_config
+            code: Compiled code object, None if the expression could not be compiled
+            slots: (variable name, field reference) pairs; a None reference binds the current field value
+            error: Exception to raise on evaluation (invalid expression definitions)
+            vector_plan: VectorPlan if the expression can be evaluated column-wise in batch mode
+        """
+        self.source = source
+        self.code = code
+        self.slots = slots or []
+        self.error = error
+        self.vector_plan = vector_plan
+
+    @property
+    def field_refs(self) -> List[str]:
+        """Field references read by the expression, without the current field value"""
+        return [field_ref for _, field_ref in self.slots if field_ref is not None]
+
+    @property
+    def uses_current_value(self) -> bool:
+        """Whether the expression reads the value of the field being validated"""
+        return any(field_ref is None for _, field_ref in self.slots)
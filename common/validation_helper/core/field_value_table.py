@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+from .constants import ValidationConstants
+
+# Field keys written by validate_data while validating, references to them are never cached
+VALIDATION_RESULT_KEYS = {"message", "pass"}
+
+# Marks a field value that has to be bound again on every use (containers, non-finite numbers, ...)
+UNBOUND = object()
+
+
+class FieldValue:
+    """Typed views of a referenced field value, computed once per document"""
+
+    __slots__ = ("raw", "cleaned", "decimal", "is_null", "bound", "_date")
+
+    def __init__(self, raw: Any, cleaned: Optional[str] = None, decimal: Optional[Decimal] = None,
+                 is_null: bool = False, bound: Any = UNBOUND):
+        """
+        Args:
+            raw: Value as stored in the document
+            cleaned: Cleaned string value, None if the raw value is not a string
+            decimal: Decimal value if the cleaned string parses as a number
+            is_null: Whether the value is empty or a null placeholder
+            bound: Value bound to expression slots, UNBOUND if it has to be converted on every use
+        """
+        self.raw = raw
+        self.cleaned = cleaned
+        self.decimal = decimal
+        self.is_null = is_null
+        self.bound = bound
+        self._date = UNBOUND
+
+    @property
+    def is_bound(self) -> bool:
+        """Whether the bound value can be reused for every expression reading this field"""
+        return self.bound is not UNBOUND
+
+    @property
+    def date(self) -> Optional[date]:
+        """Date value if the cleaned string parses with DATE_FORMAT, parsed on first access"""
+        if self._date is UNBOUND:
+            try:
+                self._date = datetime.strptime(self.cleaned, ValidationConstants.DATE_FORMAT).date()
+            except (TypeError, ValueError):
+                self._date = None
+        return self._date
+
+
+class FieldValueTable:
+    """
+    Per-document table of the field values read by expression rules.
+
+    Each referenced field is looked up and normalized the first time a rule reads it,
+    every other rule evaluated against the same document reuses the entry.
+    """
+
+    def __init__(self, data: Dict, loader: Callable[[Dict, str], FieldValue]):
+        """
+        Args:
+            data: Document being validated
+            loader: Function looking up and normalizing a field reference in the document
+        """
+        self.data = data
+        self._loader = loader
+        self._values: Dict[str, FieldValue] = {}
+
+    def get(self, field_ref: str) -> Optional[FieldValue]:
+        """
+        Get the normalized value of a field reference
+
+        Args:
+            field_ref: Field reference like 'bos.sale_price.value'
+
+        Returns:
+            FieldValue, or None if the reference reads validation results, which change while validating
+        """
+        field_value = self._values.get(field_ref)
+        if field_value is None:
+            if VALIDATION_RESULT_KEYS.intersection(field_ref.split(".")[2:]):
+                return None
+            field_value = self._values[field_ref] = self._loader(self.data, field_ref)
+        return field_value
@@ -0,0 +1,126 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .enums import ValidationType
+
+
+class RuleIndex:
+    """
+    Pre-indexed lookup table over the validation rules of a configuration.
+
+    Built once per configuration and reused for every document validated against it,
+    so the per-field lookup is a dictionary access instead of a scan over every rule.
+    """
+
+    def __init__(self, config_data: list, rule_converter: Callable[[Dict], Dict]):
+        """
+        Build the index from the 'properties' list of a validation configuration
+
+        Args:
+            config_data: List of property groups, each one holding 'validation_rules'
+            rule_converter: Function converting a config rule into the engine format
+        """
+        self.config_data = config_data
+        self.group_level_rules: List[Dict] = []
+        self.field_rules: Dict[Tuple[str, str], List[Dict]] = {}
+
+        for property_group in config_data:
+            for rule in property_group.get("validation_rules", []):
+                rule_id = rule.get("id", "")
+
+                # Empty or missing groups means it's a group-level validation
+                if not rule.get("groups", []):
+                    converted_rule = rule_converter(rule)
+                    converted_rule["id"] = rule_id  # Keep the id for group-level rules
+                    self.group_level_rules.append(converted_rule)
+
+                # Field-level rules follow the group.field.<suffix> id pattern
+                id_parts = rule_id.split(".", 2)
+                if len(id_parts) == 3:
+                    converted_rule = rule_converter(rule)
+                    converted_rule["id"] = rule_id  # Reported by the rule profiler
+                    self.field_rules.setdefault((id_parts[0], id_parts[1]), []).append(converted_rule)
+
+        # Dependency graph: which (group, field) values each rule reads, keys are lower-cased
+        self.field_dependents: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        for field_key, rules in self.field_rules.items():
+            reads = {self._normalize_key(field_key)}
+            for rule in rules:
+                reads.update(self._get_field_rule_reads(rule))
+            for read_key in reads:
+                self.field_dependents.setdefault(read_key, set()).add(field_key)
+
+        # None means the rule reads the whole document
+        self.group_rule_reads: List[Optional[Set[Tuple[str, str]]]] = [
+            self._get_group_rule_reads(rule) for rule in self.group_level_rules
+        ]
+
+    def get_field_rules(self, group_name: str, field_name: str) -> List[Dict]:
+        """
+        Get the rules that apply to a specific field
+
+        Args:
+            group_name: Group the field belongs to
+            field_name: Name of the field
+
+        Returns:
+            List of converted rules, in configuration order
+        """
+        return self.field_rules.get((group_name, field_name), [])
+
+    def get_dependent_rules(self, changed_fields: Iterable[Tuple[str, str]]) -> Tuple[Set[Tuple[str, str]], List[Dict]]:
+        """
+        Get the rules whose inputs include any of the changed fields
+
+        Args:
+            changed_fields: (group, field) pairs whose values changed
+
+        Returns:
+            Tuple of (field keys whose rules must be re-run, group-level rules to re-run)
+        """
+        changed = {self._normalize_key(field_key) for field_key in changed_fields}
+        if not changed:
+            return set(), []
+
+        field_keys = set()
+        for changed_key in changed:
+            field_keys.update(self.field_dependents.get(changed_key, ()))
+
+        group_level_rules = [
+            rule for rule, reads in zip(self.group_level_rules, self.group_rule_reads)
+            if reads is None or reads & changed
+        ]
+        return field_keys, group_level_rules
+
+    def _get_field_rule_reads(self, rule: Dict) -> Set[Tuple[str, str]]:
+        """
+        Get the (group, field) values referenced by a converted field-level rule
+
+        Returns:
+            Set of lower-cased keys, without the field being validated (it is always a dependency)
+        """
+        if rule.get("validation_type") != ValidationType.EXPRESSION_TYPE_LIST.value:
+            return set()
+
+        reads = set()
+        for compiled in rule.get("compiled_expressions") or []:
+            reads.update(self._normalize_key(tuple(field_ref.split(".")[:2])) for field_ref in compiled.field_refs)
+        return reads
+
+    def _get_group_rule_reads(self, rule: Dict) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Get the (group, field) values referenced by a converted group-level rule
+
+        Returns:
+            Set of lower-cased keys, or None if the rule reads the whole document ('value' or a regex)
+        """
+        if rule.get("validation_type") != ValidationType.EXPRESSION_TYPE_LIST.value:
+            return None
+
+        compiled_expressions = rule.get("compiled_expressions") or []
+        if any(compiled.uses_current_value for compiled in compiled_expressions):
+            return None
+        return self._get_field_rule_reads(rule)
+
+    @staticmethod
+    def _normalize_key(field_key: Tuple[str, str]) -> Tuple[str, str]:
+        """Lower-case a (group, field) key, references are matched case-insensitively"""
+        return field_key[0].lower(), field_key[1].lower()
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Tuple
+
+# Positions in the per-rule stats list, a plain list keeps recording cheap
+COUNT, TOTAL_SECONDS, MAX_SECONDS, FAILURES, EXCEPTIONS = range(5)
+
+
+class RuleProfiler:
+    """
+    In-memory aggregator of per-rule evaluation statistics.
+
+    Enabled by setting ValidationEngine.profiler; when it is None the engine does not time anything.
+    """
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str], List] = {}
+
+    def record(self, rule_id: str, validation_type: str, elapsed: float, failed: bool, raised: bool):
+        """
+        Record one evaluation of a rule
+
+        Args:
+            rule_id: Id of the rule in validation_config
+            validation_type: Validation type of the rule
+            elapsed: Wall time of the evaluation, in seconds
+            failed: Whether the rule reported a validation error
+            raised: Whether the evaluation raised an exception
+        """
+        stats = self.stats.get((rule_id, validation_type))
+        if stats is None:
+            stats = self.stats[(rule_id, validation_type)] = [0, 0.0, 0.0, 0, 0]
+
+        stats[COUNT] += 1
+        stats[TOTAL_SECONDS] += elapsed
+        if elapsed > stats[MAX_SECONDS]:
+            stats[MAX_SECONDS] = elapsed
+        stats[FAILURES] += failed
+        stats[EXCEPTIONS] += raised
+
+    def summary(self, top: int = None) -> List[Dict[str, Any]]:
+        """
+        Get the recorded statistics, slowest rules first
+
+        Args:
+            top: Only return this many rules
+
+        Returns:
+            List of per-rule statistics with times in milliseconds
+        """
+        rules = [
+            {
+                "rule_id": rule_id,
+                "validation_type": validation_type,
+                "count": stats[COUNT],
+                "total_ms": round(stats[TOTAL_SECONDS] * 1000, 3),
+                "mean_ms": round(stats[TOTAL_SECONDS] * 1000 / stats[COUNT], 3),
+                "max_ms": round(stats[MAX_SECONDS] * 1000, 3),
+                "failures": stats[FAILURES],
+                "exceptions": stats[EXCEPTIONS],
+            }
+            for (rule_id, validation_type), stats in self.stats.items()
+        ]
+        rules.sort(key=lambda rule: rule["total_ms"], reverse=True)
+        return rules[:top] if top else rules
+
+    def reset(self):
+        """Clear the recorded statistics"""
+        self.stats.clear()
@@ -1,5 +1,8 @@
+import time
 from typing import Dict, Any, List
 from .enums import ValidationType
+from .field_value_table import FieldValueTable
+from .rule_profiler import RuleProfiler
 from ..validators.regex_validator import RegexValidator
 from ..validators.expression_validator import ExpressionValidator
 
@@ -9,10 +12,29 @@ class ValidationEngine:
     def __init__(self):
         self.regex_validator = RegexValidator()
         self.expression_validator = ExpressionValidator()
+        self.profiler: RuleProfiler = None  # Per-rule timing, disabled unless a RuleProfiler is set
+
+    def compile_rule(self, rule: Dict) -> Dict:
+        """Attach the pre-compiled form of a rule's definitions, built once when the config is loaded"""
+        try:
+            validation_enum = ValidationType(rule.get("validation_type"))
+        except ValueError:
+            # Unsupported types are reported when the rule is validated
+            return rule
+
+        if validation_enum == ValidationType.REGEX_LIST:
+            rule["compiled_regexes"], rule["combined_regex"] = self.regex_validator.compile_regexes(
+                rule.get("regexes", []), rule.get("conditionType", "AND"))
+
+        if validation_enum == ValidationType.EXPRESSION_TYPE_LIST:
+            rule["compiled_expressions"] = self.expression_validator.compile_expressions(rule.get("expressions", []))
+
+        return rule
 
     def validate_field(self, field_value: Any, field_config: Dict, config: Dict,
                        all_data: Dict = None, current_group: str = None,
-                       current_field: str = None) -> List[str]:
+                       current_field: str = None, precomputed: Dict = None,
+                       field_values: FieldValueTable = None) -> List[str]:
         field_errors = []
 
         validation_rules = field_config.get("validation_rules", [])
@@ -21,9 +43,16 @@ class ValidationEngine:
 
             validation_enum = ValidationType(validation_type)
 
-            is_valid, error_msg = self._dispatch_field_validation(
-                validation_enum, field_value, rule, config, all_data, current_group, current_field
-            )
+            if self.profiler is None:
+                is_valid, error_msg = self._dispatch_field_validation(
+                    validation_enum, field_value, rule, config, all_data, current_group, current_field, precomputed,
+                    field_values
+                )
+            else:
+                is_valid, error_msg = self._dispatch_profiled_validation(
+                    validation_enum, field_value, rule, config, all_data, current_group, current_field, precomputed,
+                    field_values
+                )
 
             if not is_valid:
                 field_errors.append(error_msg)
@@ -33,7 +62,8 @@ class ValidationEngine:
 
     def _dispatch_field_validation(self, validation_type: ValidationType, field_value: Any,
                                    rule: Dict, config: Dict, all_data: Dict,
-                                   current_group: str, current_field: str) -> tuple:
+                                   current_group: str, current_field: str, precomputed: Dict = None,
+                                   field_values: FieldValueTable = None) -> tuple:
 
         match validation_type:
             case ValidationType.REGEX_LIST:
@@ -41,8 +71,28 @@ class ValidationEngine:
 
             case ValidationType.EXPRESSION_TYPE_LIST:
                 return self.expression_validator.validate_expression_list(
-                    field_value, rule, config, all_data, current_group, current_field
+                    field_value, rule, config, all_data, current_group, current_field, precomputed, field_values
                 )
 
             case _:
                 raise ValueError(f"Unsupported validation type: {validation_type.value}")
+
+    def _dispatch_profiled_validation(self, validation_type: ValidationType, field_value: Any,
+                                      rule: Dict, config: Dict, all_data: Dict,
+                                      current_group: str, current_field: str, precomputed: Dict = None,
+                                      field_values: FieldValueTable = None) -> tuple:
+        """Dispatch a rule like _dispatch_field_validation, recording its timing and outcome in the profiler"""
+        start = time.perf_counter()
+        try:
+            is_valid, error_msg = self._dispatch_field_validation(
+                validation_type, field_value, rule, config, all_data, current_group, current_field, precomputed,
+                field_values
+            )
+        except Exception:
+            self.profiler.record(rule.get("id", "unknown_rule"), validation_type.value,
+                                 time.perf_counter() - start, False, True)
+            raise
+
+        self.profiler.record(rule.get("id", "unknown_rule"), validation_type.value,
+                             time.perf_counter() - start, not is_valid, False)
+        return is_valid, error_msg
@@ -0,0 +1,296 @@
+import ast
+import operator
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Vectorized evaluation is optional, rules fall back to row-by-row evaluation
+    np = None
+
+from .enums import ValidationType
+from .field_value_table import VALIDATION_RESULT_KEYS, FieldValueTable
+from .rule_index import RuleIndex
+
+COMPARE_OPERATORS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+}
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+# Allowed calls and their arity, both convert their arguments with float() (see MathUtils)
+FLOAT_FUNCTIONS = {"abs": 1, "safe_subtract": 2}
+
+# Largest integer magnitude evaluated column-wise, float64 keeps sums and products of these exact
+MAX_EXACT_INT = 2 ** 50
+MAX_EXACT_INT_WITH_PRODUCTS = 2 ** 26
+
+
+class VectorPlan:
+    """
+    Column-wise evaluation plan for a numeric expression, detected when the expression is compiled.
+
+    Covers comparisons and +, -, * arithmetic over numeric constants, abs() and safe_subtract().
+    Rows whose values would not behave exactly like row-by-row evaluation (strings or Decimals used
+    directly in arithmetic, very large integers, ...) are reported as unresolved.
+    """
+
+    def __init__(self, body: ast.expr, float_slots: set, direct_slots: set, null_is_false: bool, int_limit: int):
+        """
+        Args:
+            body: Expression body, with field references already rewritten into slot names
+            float_slots: Slots only used as abs()/safe_subtract() arguments (converted with float())
+            direct_slots: Slots used directly in arithmetic or comparisons
+            null_is_false: Whether a None value in any slot always makes the expression False
+            int_limit: Largest integer magnitude evaluated column-wise
+        """
+        self.body = body
+        self.float_slots = float_slots
+        self.direct_slots = direct_slots
+        self.null_is_false = null_is_false
+        self.int_limit = int_limit
+
+    @classmethod
+    def build(cls, tree: ast.Expression, slot_names: List[str]) -> Optional["VectorPlan"]:
+        """
+        Detect whether a compiled expression can be evaluated column-wise
+
+        Args:
+            tree: Parsed expression with field references rewritten into slot names
+            slot_names: Names of the expression variable slots
+
+        Returns:
+            VectorPlan, or None if the expression has to be evaluated row by row
+        """
+        analysis = {"float": set(), "direct": set(), "null_is_false": True, "products": False}
+        if not cls._is_vectorizable(tree.body, set(slot_names), analysis, in_float_call=False):
+            return None
+
+        return cls(
+            tree.body,
+            analysis["float"] - analysis["direct"],
+            analysis["direct"],
+            analysis["null_is_false"],
+            MAX_EXACT_INT_WITH_PRODUCTS if analysis["products"] else MAX_EXACT_INT
+        )
+
+    @classmethod
+    def _is_vectorizable(cls, node: ast.AST, slot_names: set, analysis: Dict, in_float_call: bool) -> bool:
+        """Check recursively that a node only uses supported numeric constructs, recording slot usage"""
+        if isinstance(node, ast.Name):
+            if node.id not in slot_names:
+                return False
+            analysis["float" if in_float_call else "direct"].add(node.id)
+            return True
+
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return isinstance(value, float) or (isinstance(value, int) and abs(value) <= MAX_EXACT_INT_WITH_PRODUCTS)
+
+        if isinstance(node, ast.Compare):
+            if not all(type(op) in COMPARE_OPERATORS for op in node.ops):
+                return False
+            # None == x does not raise, so a null value would not simply make the expression False
+            if any(isinstance(op, (ast.Eq, ast.NotEq)) for op in node.ops) and \
+                    any(isinstance(operand, ast.Name) for operand in [node.left, *node.comparators]):
+                analysis["null_is_false"] = False
+            return all(cls._is_vectorizable(operand, slot_names, analysis, False)
+                       for operand in [node.left, *node.comparators])
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in BINARY_OPERATORS:
+                return False
+            analysis["products"] |= isinstance(node.op, ast.Mult)
+            return cls._is_vectorizable(node.left, slot_names, analysis, False) and \
+                cls._is_vectorizable(node.right, slot_names, analysis, False)
+
+        if isinstance(node, ast.UnaryOp):
+            return type(node.op) in UNARY_OPERATORS and \
+                cls._is_vectorizable(node.operand, slot_names, analysis, False)
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FLOAT_FUNCTIONS or node.keywords \
+                    or len(node.args) != FLOAT_FUNCTIONS[node.func.id]:
+                return False
+            return all(cls._is_vectorizable(arg, slot_names, analysis, True) for arg in node.args)
+
+        return False
+
+    def evaluate(self, rows: List[Optional[Dict[str, Any]]]) -> List[Optional[bool]]:
+        """
+        Evaluate the expression for a batch of rows
+
+        Args:
+            rows: Bound slot values per document, None for documents that could not be bound
+
+        Returns:
+            Result per row, None for the rows that have to be evaluated row by row
+        """
+        row_count = len(rows)
+        resolved = np.ones(row_count, dtype=bool)
+        known_false = np.zeros(row_count, dtype=bool)
+        columns = {}
+
+        for slot_name in self.float_slots | self.direct_slots:
+            column = np.zeros(row_count, dtype=np.float64)
+            as_float = slot_name in self.float_slots
+            for row_number, row in enumerate(rows):
+                if row is None:
+                    resolved[row_number] = False
+                    continue
+
+                number = self._to_number(row.get(slot_name), as_float)
+                if number is None:
+                    resolved[row_number] = False
+                elif number is False:
+                    known_false[row_number] = True
+                else:
+                    column[row_number] = number
+            columns[slot_name] = column
+
+        with np.errstate(all="ignore"):
+            result = self._evaluate_node(self.body, columns)
+            if not isinstance(self.body, ast.Compare):
+                result = np.asarray(result) != 0
+        result = np.broadcast_to(result, (row_count,))
+
+        return [
+            False if known_false[i] else (bool(result[i]) if resolved[i] else None)
+            for i in range(row_count)
+        ]
+
+    def _to_number(self, value: Any, as_float: bool) -> Any:
+        """
+        Convert a bound value into its column value
+
+        Returns:
+            The number, False if the row is known to evaluate to False, None if it must be evaluated row by row
+        """
+        if value is None:
+            # abs()/safe_subtract() raise on None, direct uses only when no == / != can absorb it
+            return False if as_float or self.null_is_false else None
+
+        if as_float:
+            # Mirrors float() in MathUtils, conversion errors make the expression False
+            try:
+                return float(value)
+            except Exception:
+                return False
+
+        if isinstance(value, bool) or (isinstance(value, int) and abs(value) <= self.int_limit):
+            return int(value)
+        if isinstance(value, float):
+            return value
+        return None
+
+    def _evaluate_node(self, node: ast.AST, columns: Dict[str, Any]) -> Any:
+        """Evaluate an AST node over numpy columns"""
+        if isinstance(node, ast.Name):
+            return columns[node.id]
+
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+
+        if isinstance(node, ast.Compare):
+            left = self._evaluate_node(node.left, columns)
+            result = True
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate_node(comparator, columns)
+                result = np.logical_and(result, COMPARE_OPERATORS[type(op)](left, right))
+                left = right
+            return result
+
+        if isinstance(node, ast.BinOp):
+            return BINARY_OPERATORS[type(node.op)](self._evaluate_node(node.left, columns),
+                                                   self._evaluate_node(node.right, columns))
+
+        if isinstance(node, ast.UnaryOp):
+            return UNARY_OPERATORS[type(node.op)](self._evaluate_node(node.operand, columns))
+
+        # Calls, only abs and safe_subtract pass the plan detection
+        args = [self._evaluate_node(arg, columns) for arg in node.args]
+        return np.abs(args[0]) if node.func.id == "abs" else args[0] - args[1]
+
+
+class VectorizedEvaluator:
+    """Evaluates the vectorizable expressions of a rule index column-wise over a chunk of documents"""
+
+    def __init__(self, expression_validator):
+        """
+        Args:
+            expression_validator: ExpressionValidator used to bind the expression slots of each document
+        """
+        self.expression_validator = expression_validator
+
+    @staticmethod
+    def is_available() -> bool:
+        """Whether numpy is installed, vectorized evaluation is skipped otherwise"""
+        return np is not None
+
+    def precompute(self, chunk: List[dict], rule_index: RuleIndex,
+                   field_values: List[FieldValueTable] = None) -> List[Dict[Tuple[int, int], bool]]:
+        """
+        Evaluate every vectorizable expression of the rule index for a chunk of documents
+
+        Args:
+            chunk: Documents to validate
+            rule_index: Compiled configuration
+            field_values: Field value table of each document, shared with the row-by-row validation
+
+        Returns:
+            Per document, the results keyed by (id(rule), expression position) for the resolved rows
+        """
+        precomputed = [{} for _ in chunk]
+
+        # Group-level rules validate the whole document, field-level rules the field they are indexed under
+        targets = [(rule, None, None) for rule in rule_index.group_level_rules]
+        targets += [(rule, group_name, field_name)
+                    for (group_name, field_name), rules in rule_index.field_rules.items() for rule in rules]
+
+        for rule, group_name, field_name in targets:
+            if rule.get("validation_type") != ValidationType.EXPRESSION_TYPE_LIST.value:
+                continue
+
+            for position, compiled in enumerate(rule.get("compiled_expressions") or []):
+                if compiled.vector_plan is None or any(
+                        VALIDATION_RESULT_KEYS.intersection(field_ref.split(".")[2:]) for field_ref in compiled.field_refs):
+                    continue
+
+                document_numbers, rows = [], []
+                for document_number, data in enumerate(chunk):
+                    if group_name is None:
+                        field_value = data
+                    else:
+                        fields = data.get("groups", {}).get(group_name, {}).get("fields", {})
+                        if field_name not in fields:
+                            continue
+                        field_data = fields[field_name]
+                        field_value = field_data.get("value") if isinstance(field_data, dict) else field_data
+
+                    try:
+                        row = self.expression_validator.bind_slots(
+                            compiled, field_value, data, group_name, field_values[document_number] if field_values else None
+                        )
+                    except Exception:
+                        row = None
+                    document_numbers.append(document_number)
+                    rows.append(row)
+
+                if not rows:
+                    continue
+
+                for document_number, result in zip(document_numbers, compiled.vector_plan.evaluate(rows)):
+                    if result is not None:
+                        precomputed[document_number][(id(rule), position)] = result
+
+        return precomputed
@@ -1,11 +1,15 @@
+import ast
 import re
 from datetime import datetime
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 from decimal import Decimal, InvalidOperation
 
 # This assumes the project structure allows these relative imports.
 from .base_validator import BaseValidator
+from ..core.compiled_expression import CompiledExpression
 from ..core.constants import ValidationConstants
+from ..core.field_value_table import FieldValue, FieldValueTable
+from ..core.vectorized_evaluator import VectorPlan
 from ..utils.math_utils import MathUtils
 
 
@@ -18,6 +22,14 @@ class ExpressionValidator(BaseValidator):
     def __init__(self):
         """Initialize expression validator with math utilities."""
         self.math_utils = MathUtils()
+        self._compiled_cache = {}
+        self._eval_globals = {
+            "__builtins__": {"None": None, "True": True, "False": False},
+            **ValidationConstants.SAFE_EVAL_ALLOWED_NAMES,
+            "abs": self.math_utils.safe_abs,
+            "safe_subtract": self.math_utils.safe_subtract,
+            "date_is_future": self._date_is_future
+        }
 
     def validate(self, value: Any, rule: Dict, **kwargs) -> Tuple[bool, str]:
         """Main validation method which delegates to the expression list validator."""
@@ -25,7 +37,8 @@ class ExpressionValidator(BaseValidator):
 
     def validate_expression_list(self, field_value: Any, rule: Dict, config: Dict,
                                  all_data: Dict = None, current_group: str = None,
-                                 current_field: str = None) -> Tuple[bool, str]:
+                                 current_field: str = None, precomputed: Dict = None,
+                                 field_values: FieldValueTable = None) -> Tuple[bool, str]:
         """Validates a field using a list of expressions defined in a rule."""
         expressions = rule.get("expressions", [])
         error_msgs = rule.get("error_msgs", [ValidationConstants.ERROR_MESSAGES["EXPRESSION_VALIDATION_FAILED"]])
@@ -34,10 +47,18 @@ class ExpressionValidator(BaseValidator):
         if not expressions:
             raise ValueError(ValidationConstants.ERROR_MESSAGES["EXPRESSIONS_LIST_REQUIRED"])
 
+        # Expressions are compiled when the config is loaded, compile here for rules built elsewhere
+        compiled_expressions = rule.get("compiled_expressions") or self.compile_expressions(expressions)
+
         results = []
-        for i, expr in enumerate(expressions):
+        for i, compiled in enumerate(compiled_expressions):
+            expr = compiled.source
             try:
-                result = self._evaluate_expression_with_context(expr, field_value, all_data)
+                if precomputed and (id(rule), i) in precomputed:
+                    # Already evaluated column-wise in batch mode
+                    result = precomputed[(id(rule), i)]
+                else:
+                    result = self._evaluate_expression_with_context(compiled, field_value, all_data, field_values)
                 results.append(result)
                 if not result and i < len(error_msgs):
                     return False, error_msgs[i]
@@ -101,9 +122,15 @@ class ExpressionValidator(BaseValidator):
             return value # Return non-strings (like None or numbers) immediately.
 
         # 1. Remove the [Id: ...] metadata string from the extracted value.
-        # This regex finds and removes the pattern " [Id: ...]" from the end of the string.
-        cleaned_value = re.sub(r'\s*\[Id:.*?\]\s*$', '', value).strip()
+        cleaned_value = self._strip_extractor_id(value)
+        return self._convert_cleaned_value(cleaned_value)
+
+    def _strip_extractor_id(self, value: str) -> str:
+        """Removes the pattern " [Id: ...]" from the end of an extracted value."""
+        return re.sub(r'\s*\[Id:.*?\]\s*$', '', value).strip()
 
+    def _convert_cleaned_value(self, cleaned_value: str) -> Any:
+        """Converts a cleaned string into None, a Decimal or the string itself."""
         # 2. Check for placeholder values that should be treated as None.
         if cleaned_value.upper() in ValidationConstants.NULL_PLACEHOLDER_VALUES or cleaned_value == "":
             return None
@@ -120,24 +147,70 @@ class ExpressionValidator(BaseValidator):
         """Converts a field reference into a valid Python identifier."""
         return re.sub(r'[^a-zA-Z0-9_]', '_', field_ref)
 
-    def _evaluate_expression_with_context(self, expression: str, field_value: Any, all_data: Dict) -> bool:
-        """Orchestrates the lookup, cleaning, normalization, and safe evaluation."""
+    def compile_expressions(self, expressions: List[Any]) -> List[CompiledExpression]:
+        """Compiles a rule's expressions once, reusing the cached result for repeated expressions."""
+        compiled_expressions = []
+        for expression in expressions:
+            if not isinstance(expression, str):
+                compiled_expressions.append(self._compile_expression(expression))
+                continue
+
+            compiled = self._compiled_cache.get(expression)
+            if compiled is None:
+                compiled = self._compile_expression(expression)
+                self._compiled_cache[expression] = compiled
+            compiled_expressions.append(compiled)
+        return compiled_expressions
+
+    def _compile_expression(self, expression: Any) -> CompiledExpression:
+        """Rewrites field references into sanitized variable names and compiles the result."""
+        if not isinstance(expression, str) or not expression.strip():
+            return CompiledExpression(expression)
+
         field_refs = sorted(list(set(re.findall(ValidationConstants.FIELD_REFERENCE_PATTERN, expression))), key=len, reverse=True)
-        eval_context = {}
+        slots = []
         transformed_expression = expression
 
         for ref in field_refs:
             sanitized_name = self._sanitize_variable_name(ref)
-            
+            slots.append((sanitized_name, ref))
+            transformed_expression = re.sub(r'\b' + re.escape(ref) + r'\b', sanitized_name, transformed_expression)
+
+        try:
+            tree = ast.parse(transformed_expression, mode="eval")
+            code = compile(tree, "<validation_expression>", "eval")
+        except (SyntaxError, ValueError) as e:
+            # Reported by _execute_safely when the expression is evaluated, as any other evaluation error
+            return CompiledExpression(expression, None, slots, error=e)
+
+        return CompiledExpression(expression, code, slots,
+                                  vector_plan=VectorPlan.build(tree, [sanitized_name for sanitized_name, _ in slots]))
+
+    def _evaluate_expression_with_context(self, compiled: CompiledExpression, field_value: Any, all_data: Dict,
+                                          field_values: FieldValueTable = None) -> bool:
+        """Orchestrates the lookup, cleaning, normalization, and safe evaluation."""
+        return self._execute_safely(compiled, self.bind_slots(compiled, field_value, all_data, None, field_values))
+
+    def bind_slots(self, compiled: CompiledExpression, field_value: Any, all_data: Dict,
+                   current_group: str = None, field_values: FieldValueTable = None) -> Dict[str, Any]:
+        """Looks up, cleans and normalizes the values bound to the variables of a compiled expression."""
+        eval_context = {}
+
+        for sanitized_name, ref in compiled.slots:
             # Get the raw value, either from the current field or by looking it up.
             if ref.lower() == 'value':
                 raw_value = field_value
             else:
+                # Referenced fields are cleaned once per document when a field value table is given.
+                entry = field_values.get(ref) if field_values is not None else None
+                if entry is not None:
+                    eval_context[sanitized_name] = entry.bound
+                    continue
                 raw_value = self._get_field_value_by_reference(ref, all_data)
-            
+
             # Apply the universal cleaning and conversion function.
             cleaned_value = self._clean_and_convert_value(raw_value)
-            
+
             # If the result is a string, normalize it for robust comparison.
             if isinstance(cleaned_value, str):
                 final_value = self._normalize_for_comparison(cleaned_value)
@@ -146,34 +219,41 @@ class ExpressionValidator(BaseValidator):
                 final_value = cleaned_value
 
             eval_context[sanitized_name] = final_value
-            transformed_expression = re.sub(r'\b' + re.escape(ref) + r'\b', sanitized_name, transformed_expression)
-            
-        return self._execute_safely(transformed_expression, eval_context)
 
-    def _execute_safely(self, expression: str, context: Dict) -> bool:
-        """Executes the final expression string in a controlled, safe environment."""
-        if not isinstance(expression, str) or not expression.strip():
+        return eval_context
+
+    def load_field_value(self, all_data: Dict, field_ref: str) -> FieldValue:
+        """Looks up and cleans a referenced field value once per document (see FieldValueTable)."""
+        raw_value = self._get_field_value_by_reference(field_ref, all_data)
+        if not isinstance(raw_value, str):
+            return FieldValue(raw_value, is_null=raw_value is None, bound=raw_value)
+
+        cleaned_value = self._strip_extractor_id(raw_value)
+        converted_value = self._convert_cleaned_value(cleaned_value)
+        if isinstance(converted_value, str):
+            return FieldValue(raw_value, cleaned_value, bound=self._normalize_for_comparison(converted_value))
+        return FieldValue(raw_value, cleaned_value, converted_value, converted_value is None, converted_value)
+
+    def _execute_safely(self, compiled: CompiledExpression, context: Dict) -> bool:
+        """Executes the compiled expression in a controlled, safe environment."""
+        if compiled.code is None and compiled.error is None:
             return False
         try:
-            def date_is_future(date_str):
-                if not isinstance(date_str, str): return False
-                try:
-                    return datetime.strptime(date_str, "%m/%d/%Y").date() >= datetime.now().date()
-                except (ValueError, TypeError): return False
-
-            allowed_globals = {
-                "__builtins__": {"None": None, "True": True, "False": False},
-                **ValidationConstants.SAFE_EVAL_ALLOWED_NAMES,
-                "abs": self.math_utils.safe_abs,
-                "safe_subtract": self.math_utils.safe_subtract,
-                "date_is_future": date_is_future
-            }
-            result = eval(expression, allowed_globals, context)
+            if compiled.error is not None:
+                raise compiled.error
+            result = eval(compiled.code, self._eval_globals, context)
             return bool(result)
         except Exception as e:
-            print(f"CRITICAL: Failed to evaluate expression='{expression}' with context={context}. Error: {e}")
+            print(f"CRITICAL: Failed to evaluate expression='{compiled.source}' with context={context}. Error: {e}")
             return False
 
+    @staticmethod
+    def _date_is_future(date_str):
+        if not isinstance(date_str, str): return False
+        try:
+            return datetime.strptime(date_str, ValidationConstants.DATE_FORMAT).date() >= datetime.now().date()
+        except (ValueError, TypeError): return False
+
     def _get_condition_type(self, rule: Dict) -> str:
         """Determines if multiple expressions should be combined with AND or OR."""
         return rule.get("condition_type", "AND").upper()
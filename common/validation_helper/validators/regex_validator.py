@@ -1,8 +1,12 @@
 import re
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 from .base_validator import BaseValidator
 from ..core.constants import ValidationConstants
 
+# Backreferences and group conditionals depend on group numbering, so those patterns are never combined
+GROUP_REFERENCE_PATTERN = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
 class RegexValidator(BaseValidator):
     """
     Validator for regex-based validation rules.
@@ -47,3 +51,105 @@ class RegexValidator(BaseValidator):
         else:
             return False, rule.get("error_msg", ValidationConstants.ERROR_MESSAGES["REGEX_VALIDATION_FAILED"])
 
+    def validate_regex_list(self, value: Any, rule: Dict) -> Tuple[bool, str]:
+        """
+        Validate value against list of regex patterns with individual error messages
+
+        Args:
+            value: The value to validate
+            rule: The validation rule containing regex patterns list
+
+        Returns:
+            Tuple of (is_valid: bool, error_message: str)
+        """
+        regex_patterns = rule.get("regexes", [])
+        error_msgs = rule.get("error_msgs", [ValidationConstants.ERROR_MESSAGES["REGEX_VALIDATION_FAILED"]])
+        condition_type = self._get_condition_type(rule)
+
+        if not regex_patterns:
+            raise ValueError(ValidationConstants.ERROR_MESSAGES["REGEX_PATTERNS_LIST_REQUIRED"])
+
+        str_value = str(value) if value is not None else ""
+
+        # Patterns are compiled when the config is loaded
+        compiled_regexes = rule.get("compiled_regexes")
+        if compiled_regexes is not None:
+            if condition_type == "OR":
+                return self._match_any(str_value, compiled_regexes, rule.get("combined_regex"), error_msgs)
+            regex_patterns = compiled_regexes
+
+        # Test all patterns
+        results = []
+        for i, pattern in enumerate(regex_patterns):
+            match_result = bool(pattern.match(str_value) if isinstance(pattern, re.Pattern) else re.match(pattern, str_value))
+            results.append(match_result)
+
+            # If this pattern failed and we have a specific error message for it
+            if not match_result and condition_type == "AND" and i < len(error_msgs):
+                return False, error_msgs[i]
+
+        # Apply condition type logic
+        final_result = self._apply_condition_logic(results, condition_type)
+
+        if final_result:
+            return True, ""
+        else:
+            # Return appropriate error message
+            if len(error_msgs) > 0:
+                return False, error_msgs[0]  # Use first error message as default
+            else:
+                return False, ValidationConstants.ERROR_MESSAGES["REGEX_VALIDATION_FAILED"]
+
+    def compile_regexes(self, regex_patterns: List[Any],
+                        condition_type: str) -> Tuple[Optional[List[Pattern]], Optional[Pattern]]:
+        """
+        Compile the patterns of a rule once, when the config is loaded
+
+        Args:
+            regex_patterns: Patterns as written in validation_config
+            condition_type: Condition type of the rule (AND/OR)
+
+        Returns:
+            Tuple of (compiled patterns, combined alternation matcher for large OR lists).
+            Compiled patterns are None if any pattern is invalid, so the error is raised on validation as before.
+        """
+        try:
+            compiled_regexes = [re.compile(pattern) for pattern in regex_patterns]
+        except (re.error, TypeError):
+            return None, None
+
+        combined_regex = None
+        if str(condition_type).upper() == "OR" and len(regex_patterns) >= ValidationConstants.REGEX_ALTERNATION_MIN_PATTERNS \
+                and all(isinstance(pattern, str) and not GROUP_REFERENCE_PATTERN.search(pattern) for pattern in regex_patterns):
+            try:
+                combined_regex = re.compile("|".join(f"(?:{pattern})" for pattern in regex_patterns))
+            except re.error:
+                # e.g. inline global flags or repeated group names, patterns are then matched one by one
+                combined_regex = None
+
+        return compiled_regexes, combined_regex
+
+    def _match_any(self, str_value: str, compiled_regexes: List[Pattern], combined_regex: Optional[Pattern],
+                   error_msgs: List[str]) -> Tuple[bool, str]:
+        """
+        OR validation with compiled patterns, stopping at the first match
+
+        Args:
+            str_value: The value to validate
+            compiled_regexes: Compiled patterns of the rule
+            combined_regex: Single alternation of all the patterns, if available
+            error_msgs: Error messages of the rule
+
+        Returns:
+            Tuple of (is_valid: bool, error_message: str)
+        """
+        if combined_regex is not None:
+            matched = combined_regex.match(str_value) is not None
+        else:
+            matched = any(pattern.match(str_value) for pattern in compiled_regexes)
+
+        if matched:
+            return True, ""
+        if len(error_msgs) > 0:
+            return False, error_msgs[0]
+        return False, ValidationConstants.ERROR_MESSAGES["REGEX_VALIDATION_FAILED"]
@@ -0,0 +1,12 @@
+"""Helpers shared by the benchmark scripts of the common package."""
+import subprocess
+from typing import Optional
+
+
+def get_commit() -> Optional[str]:
+    """Current git commit, so results can be compared between commits"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
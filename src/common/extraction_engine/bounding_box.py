@@ -0,0 +1,33 @@
+def merge_word_boxes(word_ids, ids_to_coord_mapping, ids_to_page_mapping):
+    """
+    Computes the boxes surrounding a multi-word value from the Textract geometry of its words.
+
+    The box of each page is the min/max over the polygon points of the words on that page, so a value
+    spanning several pages gets one box per page. Boxes are returned in the order their page first
+    appears in word_ids, in the Case Manager coordinates format (page is 1-based).
+    """
+    page_bounds = {}
+    for word_id in word_ids:
+        page_nr = ids_to_page_mapping[word_id]
+        points = ids_to_coord_mapping[word_id]['Polygon']
+        xs = [point['X'] for point in points]
+        ys = [point['Y'] for point in points]
+        bounds = page_bounds.get(page_nr)
+        if bounds is None:
+            page_bounds[page_nr] = [min(xs), min(ys), max(xs), max(ys)]
+        else:
+            bounds[0] = min(bounds[0], *xs)
+            bounds[1] = min(bounds[1], *ys)
+            bounds[2] = max(bounds[2], *xs)
+            bounds[3] = max(bounds[3], *ys)
+
+    return [
+        {
+            "x": min_x,
+            "y": min_y,
+            "width": max_x - min_x,
+            "height": max_y - min_y,
+            "page": page_nr + 1
+        }
+        for page_nr, (min_x, min_y, max_x, max_y) in page_bounds.items()
+    ]
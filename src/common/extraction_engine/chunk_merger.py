@@ -0,0 +1,48 @@
+import re
+from typing import Dict, List, Tuple
+
+FIRST_FOUND = 'first_found'
+HIGHEST_CONFIDENCE = 'highest_confidence'
+MERGE_POLICIES = (FIRST_FOUND, HIGHEST_CONFIDENCE)
+
+
+def normalize_vin(value) -> str:
+    """VIN compared between chunks: upper-cased, without spaces or separators"""
+    return re.sub(r'[^A-Z0-9]', '', str(value).upper())
+
+
+def merge_chunk_fields(chunk_results: List[Tuple[Dict, Dict]], policy: str = FIRST_FOUND,
+                       vin_field: str = 'vin') -> Dict:
+    """
+    Merges the fields extracted from the page ranges of a document into one result
+
+    A field missing from a chunk was not found in its pages (NONE). Among the chunks that found it, the
+    FIRST_FOUND policy keeps the value of the first page range and HIGHEST_CONFIDENCE the value with the
+    highest triage score, the first page range winning ties. When the group has a VIN, chunks reporting
+    another VIN than the first one found describe another vehicle and are left out.
+
+    Args:
+        chunk_results: (bre_fields_json, field_confidences) of every chunk, in page order
+        policy: One of MERGE_POLICIES
+        vin_field: Field holding the VIN in the group
+
+    Returns:
+        Merged bre_fields_json
+    """
+    if len(chunk_results) == 1:
+        return chunk_results[0][0]
+
+    vins = [normalize_vin(fields_json[vin_field]['value']) if fields_json.get(vin_field) else ''
+            for fields_json, _ in chunk_results]
+    primary_vin = next((vin for vin in vins if vin), '')
+    chunk_results = [chunk for chunk, vin in zip(chunk_results, vins) if not vin or vin == primary_vin]
+
+    merged_fields = {}
+    merged_confidences = {}
+    for fields_json, field_confidences in chunk_results:
+        for field, field_json in fields_json.items():
+            confidence = field_confidences.get(field, 0.0)
+            if field not in merged_fields or (policy == HIGHEST_CONFIDENCE and confidence > merged_confidences[field]):
+                merged_fields[field] = field_json
+                merged_confidences[field] = confidence
+    return merged_fields
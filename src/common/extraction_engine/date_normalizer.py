@@ -0,0 +1,99 @@
+import re
+from datetime import date
+from typing import Optional
+
+MONTHS = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+          'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12}
+MONTH_NAME_REGEX = re.compile(
+    r'(?<![a-z])(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+    r'|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?(?![a-z])', re.IGNORECASE)
+ORDINAL_SUFFIX_REGEX = re.compile(r'(?<=\d)(st|nd|rd|th)(?![a-z])', re.IGNORECASE)
+TIME_REGEX = re.compile(r'\d{1,2}:\d{2}(:\d{2})?\s*([ap]\.?m\.?)?', re.IGNORECASE)
+# Letters OCR confuses with digits, only replaced inside tokens that already contain a digit
+OCR_DIGITS = {'O': '0', 'o': '0', 'Q': '0', 'I': '1', 'l': '1', '|': '1', 'S': '5', 'B': '8'}
+OCR_TOKEN_REGEX = re.compile(r'[\dOoQIl|SB]*\d[\dOoQIl|SB]*')
+# Two-digit years up to this many years ahead of today are read as 20xx, older ones as 19xx
+TWO_DIGIT_YEAR_WINDOW = 10
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """
+    Parses a date written in any of the formats found on titles, driver licenses and MV-7Ds into MM/DD/YYYY.
+
+    Numeric dates may use any separator ('/', '-', '.', spaces) or none at all (MMDDYYYY, YYYYMMDD, MMDDYY).
+    Day-first dates are only recognised when the day is above 12; like the date_transformer prompt, ambiguous
+    dates are read as american. Month names may be abbreviated, and 2-digit years are completed using
+    TWO_DIGIT_YEAR_WINDOW.
+
+    Returns:
+        The date as MM/DD/YYYY, or None if the value cannot be parsed with confidence
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+
+    text = ORDINAL_SUFFIX_REGEX.sub('', value.strip())
+    month = None
+    month_name = MONTH_NAME_REGEX.search(text)
+    if month_name:
+        month = MONTHS[month_name.group(1)[:3].lower()]
+        text = text[:month_name.start()] + ' ' + text[month_name.end():]
+
+    text = OCR_TOKEN_REGEX.sub(lambda token: ''.join(OCR_DIGITS.get(c, c) for c in token.group()), text)
+    text = TIME_REGEX.sub(' ', text)
+    numbers = re.findall(r'\d+', text)
+
+    if month is not None:
+        return _from_month_name(month, numbers)
+    return _from_numbers(numbers)
+
+
+def _from_month_name(month: int, numbers: list) -> Optional[str]:
+    """Date with a written month: the remaining numbers are the day and the year, in either order"""
+    if len(numbers) != 2:
+        return None
+    first, second = numbers
+    if len(first) == 4 or int(first) > 31:
+        first, second = second, first
+    return _build_date(second, month, first)
+
+
+def _from_numbers(numbers: list) -> Optional[str]:
+    """Fully numeric date, either split by separators or written as a single block of digits"""
+    if len(numbers) == 1:
+        digits = numbers[0]
+        if len(digits) == 8 and digits[:2] in ('19', '20') and 1 <= int(digits[4:6]) <= 12:
+            numbers = [digits[:4], digits[4:6], digits[6:]]
+        elif len(digits) == 8:
+            numbers = [digits[:2], digits[2:4], digits[4:]]
+        elif len(digits) == 6:
+            numbers = [digits[:2], digits[2:4], digits[4:]]
+        else:
+            return None
+
+    if len(numbers) != 3:
+        return None
+
+    if len(numbers[0]) == 4:
+        year, month, day = numbers
+    else:
+        month, day, year = numbers
+        if int(month) > 12 >= int(day):
+            month, day = day, month
+    return _build_date(year, month, day)
+
+
+def _build_date(year, month, day) -> Optional[str]:
+    """Formats the parts as MM/DD/YYYY, None if they do not make a valid date"""
+    if len(str(year)) not in (2, 4):
+        return None
+    year, month, day = int(year), int(month), int(day)
+    if year < 100:
+        current_year = date.today().year
+        year += current_year // 100 * 100
+        if year > current_year + TWO_DIGIT_YEAR_WINDOW:
+            year -= 100
+
+    try:
+        return date(year, month, day).strftime('%m/%d/%Y')
+    except ValueError:
+        return None
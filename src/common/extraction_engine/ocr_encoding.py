@@ -0,0 +1,63 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from .prompts import extraction_prompt, compact_extraction_prompt
+
+
+class OcrPromptEncoder(ABC):
+    """Formats the OCR words of a page range for the extraction message, with the prompt describing that format"""
+    name = ''
+    extraction_prompt = extraction_prompt
+
+    def encode(self, pages_words: List[List[Dict]]) -> str:
+        """
+        Args:
+            pages_words: Words of every page of the range, each one as {'Text': ..., 'Id': ...}
+
+        Returns:
+            Text inserted in the extraction message
+        """
+        return self.join_pages([self.encode_page(page_words) for page_words in pages_words])
+
+    @abstractmethod
+    def encode_page(self, page_words: List[Dict]) -> str:
+        """Text of the words of one page"""
+        pass
+
+    @abstractmethod
+    def join_pages(self, encoded_pages: List[str]) -> str:
+        """Text of a page range, from the encode_page texts of its pages"""
+        pass
+
+
+class ReprOcrEncoder(OcrPromptEncoder):
+    """Historical encoding: Python repr of the word dictionaries of every page"""
+    name = 'repr'
+
+    def encode_page(self, page_words: List[Dict]) -> str:
+        return str(page_words)
+
+    def join_pages(self, encoded_pages: List[str]) -> str:
+        return '[' + ', '.join(encoded_pages) + ']'
+
+
+class CompactOcrEncoder(OcrPromptEncoder):
+    """Every word followed by its id between angle brackets (INVOICE⟨2⟩), one page per line"""
+    name = 'compact'
+    extraction_prompt = compact_extraction_prompt
+
+    def encode_page(self, page_words: List[Dict]) -> str:
+        return ' '.join(f"{word['Text']}⟨{word['Id']}⟩" for word in page_words)
+
+    def join_pages(self, encoded_pages: List[str]) -> str:
+        return '\n'.join(encoded_pages)
+
+
+OCR_PROMPT_ENCODERS = {encoder.name: encoder for encoder in (ReprOcrEncoder(), CompactOcrEncoder())}
+
+
+def get_ocr_prompt_encoder(name: str) -> OcrPromptEncoder:
+    """Returns the encoder registered under name (see OCR_PROMPT_ENCODERS)"""
+    encoder = OCR_PROMPT_ENCODERS.get(name)
+    if encoder is None:
+        raise ValueError(f"Unknown OCR prompt encoding: {name}, expected one of {sorted(OCR_PROMPT_ENCODERS)}")
+    return encoder
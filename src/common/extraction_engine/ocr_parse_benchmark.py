@@ -0,0 +1,139 @@
+"""
+Textract output parsing benchmark.
+
+Compares loading a Textract output whole (read, decode, json.loads, then walk 'Blocks') with the streaming
+parser of textract_stream, on a synthetic document or a real Textract file. Every mode runs in its own
+process, so its peak RSS is not shared with the other modes.
+
+Usage (from the repository root):
+    python -m src.common.extraction_engine.ocr_parse_benchmark --pages 150 --words 400
+    python -m src.common.extraction_engine.ocr_parse_benchmark --textract textract_output.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator
+from ..benchmark_utils import get_commit
+from .textract_stream import iter_textract_blocks
+
+MODES = ["full", "streaming"]
+CHUNK_SIZE = 1024 * 1024
+
+
+def generate_blocks(page_count: int, words_per_page: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Synthetic Textract blocks, one LINE block every 8 WORD blocks"""
+    rnd = random.Random(seed)
+
+    def block(block_type: str, page: int, text: str) -> Dict[str, Any]:
+        left, top = rnd.random(), rnd.random()
+        return {
+            "BlockType": block_type, "Confidence": rnd.uniform(80, 100), "Text": text, "TextType": "PRINTED",
+            "Geometry": {
+                "BoundingBox": {"Width": 0.05, "Height": 0.01, "Left": left, "Top": top},
+                "Polygon": [{"X": left, "Y": top}, {"X": left + 0.05, "Y": top},
+                            {"X": left + 0.05, "Y": top + 0.01}, {"X": left, "Y": top + 0.01}],
+            },
+            "Id": f"{rnd.getrandbits(128):032x}", "Page": page,
+        }
+
+    for page in range(1, page_count + 1):
+        for i in range(words_per_page):
+            if i % 8 == 0:
+                yield block("LINE", page, f"LINE {i}")
+            yield block("WORD", page, f"WORD{i}")
+
+
+def generate_textract_file(path: str, page_count: int, words_per_page: int, seed: int = 0):
+    """Write a synthetic Textract output of generate_blocks"""
+    with open(path, "w") as textract_file:
+        textract_file.write('{"DocumentMetadata": {"Pages": %d}, "Blocks": [' % page_count)
+        for i, textract_block in enumerate(generate_blocks(page_count, words_per_page, seed)):
+            textract_file.write(("" if i == 0 else ", ") + json.dumps(textract_block))
+        textract_file.write('], "DetectDocumentTextModelVersion": "1.0"}')
+
+
+def _load_blocks(blocks: Iterable[Dict]) -> int:
+    """Keep the text of the words per page, as the extraction engine does, returning the number of words"""
+    words_per_page = defaultdict(list)
+    for textract_block in blocks:
+        if textract_block['BlockType'] == 'WORD':
+            words_per_page[textract_block['Page']].append(textract_block['Text'])
+    return sum(len(words) for words in words_per_page.values())
+
+
+def _read_chunks(path: str):
+    with open(path, "rb") as textract_file:
+        while chunk := textract_file.read(CHUNK_SIZE):
+            yield chunk
+
+
+def run_mode(mode: str, path: str) -> Dict[str, Any]:
+    """Parse the file with one mode, in the current process"""
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "full":
+        with open(path, "rb") as textract_file:
+            ocr_data = json.loads(textract_file.read().decode('utf-8'))
+        words = _load_blocks(ocr_data['Blocks'])
+    else:
+        metadata = {}
+        words = _load_blocks(iter_textract_blocks(_read_chunks(path), metadata))
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "words": words,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "peak_rss_increase_mb": round((peak_kb - baseline_kb) / 1024, 1),
+    }
+
+
+def run_benchmark(path: str) -> Dict[str, Any]:
+    """Run every mode in a separate process"""
+    results = []
+    for mode in MODES:
+        output = subprocess.run([sys.executable, "-m", __spec__.name, "--worker", mode, "--textract", path],
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    return {"commit": get_commit(), "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the peak memory of the Textract parsing modes")
+    parser.add_argument("--pages", type=int, default=150, help="Number of synthetic pages")
+    parser.add_argument("--words", type=int, default=400, help="Number of synthetic words per page")
+    parser.add_argument("--textract", help="Textract output file to parse instead of a synthetic one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.worker, args.textract)))
+        return
+
+    if args.textract:
+        results = run_benchmark(args.textract)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "textract.json")
+            generate_textract_file(path, args.pages, args.words, args.seed)
+            results = run_benchmark(path)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import math
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class OcrWordStore:
+    """
+    Words and lines of a Textract document, stored column-wise in typed arrays instead of one dict per word.
+
+    The word at index i has the id str(i + 1), the id cited by the LLMs. Its page (0-based, int32), bounding box
+    (left, top, width, height, float64), polygon points (x, y pairs, float64) and Textract confidence (float32,
+    NaN when missing) are read from flat arrays, and its text is a slice of a single text buffer. The per-page,
+    per-line and per-id dictionaries of the extraction engine are read-only views built over the store: loading a
+    document only fills the arrays, the representations of a page are built when a prompt first needs them.
+    """
+
+    def __init__(self):
+        self.word_pages = array('i')
+        # Geometry is kept in double precision: the coordinates are sent to ARIA and stored exactly as Textract gave them
+        self.word_boxes = array('d')
+        self.word_polygons = array('d')
+        self.polygon_offsets = array('I', [0])  # Start of the points of every word in word_polygons (x, y pairs)
+        self.word_confidences = array('f')
+        self.word_text_offsets = array('I', [0])
+        self.word_text = ''
+        self.line_pages = array('i')
+        self.line_text_offsets = array('I', [0])
+        self.line_text = ''
+        self.generation = 0  # Incremented by finalize, so the views drop what they cached before
+        self._page_words = None  # Indexes of the words of every page, built on first use by the page views
+        self._page_lines = None
+        self._word_texts = []  # Texts added since the last finalize, appended to the text buffers by finalize
+        self._line_texts = []
+
+    def __len__(self):
+        return len(self.word_pages)
+
+    def add_word(self, text: str, page_nr: int, geometry: Dict, confidence: Optional[float]) -> str:
+        """Adds a WORD block (page_nr is 0-based) and returns its id"""
+        box = geometry['BoundingBox']
+        self.word_pages.append(page_nr)
+        self.word_boxes.extend((box['Left'], box['Top'], box['Width'], box['Height']))
+        for point in geometry['Polygon']:
+            self.word_polygons.extend((point['X'], point['Y']))
+        self.polygon_offsets.append(len(self.word_polygons))
+        self.word_confidences.append(math.nan if confidence is None else confidence)
+        self.word_text_offsets.append(self.word_text_offsets[-1] + len(text))
+        self._word_texts.append(text)
+        return str(len(self.word_pages))
+
+    def add_line(self, text: str, page_nr: int):
+        """Adds a LINE block (page_nr is 0-based)"""
+        self.line_pages.append(page_nr)
+        self.line_text_offsets.append(self.line_text_offsets[-1] + len(text))
+        self._line_texts.append(text)
+
+    def finalize(self):
+        """Appends the texts added since the last call to the text buffers, must be called before reading them"""
+        if self._word_texts:
+            self.word_text += ''.join(self._word_texts)
+            self._word_texts = []
+        if self._line_texts:
+            self.line_text += ''.join(self._line_texts)
+            self._line_texts = []
+        self._page_words = self._page_lines = None
+        self.generation += 1
+
+    def load_blocks(self, blocks: Iterable[Dict]):
+        """Adds the WORD and LINE blocks of a Textract output, in document order"""
+        # Same steps as add_word and add_line, inlined as this runs for every block of the document
+        word_pages_append, word_boxes_extend = self.word_pages.append, self.word_boxes.extend
+        word_polygons, polygon_offsets_append = self.word_polygons, self.polygon_offsets.append
+        word_confidences_append, word_texts_append = self.word_confidences.append, self._word_texts.append
+        word_text_offsets_append = self.word_text_offsets.append
+        word_text_end = self.word_text_offsets[-1]
+        for block in blocks:
+            block_type = block['BlockType']
+            if block_type == 'WORD':
+                page_nr = int(block['Page']) - 1
+                geometry, text, confidence = block['Geometry'], block['Text'], block.get('Confidence')
+                box = geometry['BoundingBox']
+                word_pages_append(page_nr)
+                word_boxes_extend((box['Left'], box['Top'], box['Width'], box['Height']))
+                word_polygons.extend([coordinate for point in geometry['Polygon']
+                                      for coordinate in (point['X'], point['Y'])])
+                polygon_offsets_append(len(word_polygons))
+                word_confidences_append(math.nan if confidence is None else confidence)
+                word_text_end += len(text)
+                word_text_offsets_append(word_text_end)
+                word_texts_append(text)
+            elif block_type == 'LINE':
+                self.add_line(block['Text'], int(block['Page']) - 1)
+        self.finalize()
+
+    @staticmethod
+    def _index_pages(pages: array) -> Dict[int, array]:
+        page_indexes = {}
+        for index, page_nr in enumerate(pages):
+            indexes = page_indexes.get(page_nr)
+            if indexes is None:
+                indexes = page_indexes[page_nr] = array('I')
+            indexes.append(index)
+        return page_indexes
+
+    @property
+    def page_words(self) -> Dict[int, array]:
+        """Indexes of the words of every page, in document order"""
+        if self._page_words is None:
+            self._page_words = self._index_pages(self.word_pages)
+        return self._page_words
+
+    @property
+    def page_lines(self) -> Dict[int, array]:
+        """Indexes of the lines of every page, in document order"""
+        if self._page_lines is None:
+            self._page_lines = self._index_pages(self.line_pages)
+        return self._page_lines
+
+    def get_index(self, word_id) -> int:
+        """Index of a word id, KeyError if there is no such word"""
+        try:
+            index = int(word_id) - 1
+        except (TypeError, ValueError):
+            raise KeyError(word_id) from None
+        if not 0 <= index < len(self.word_pages):
+            raise KeyError(word_id)
+        return index
+
+    def get_text(self, index: int) -> str:
+        return self.word_text[self.word_text_offsets[index]:self.word_text_offsets[index + 1]]
+
+    def get_line_text(self, index: int) -> str:
+        return self.line_text[self.line_text_offsets[index]:self.line_text_offsets[index + 1]]
+
+    def get_confidence(self, index: int) -> Optional[float]:
+        confidence = self.word_confidences[index]
+        return None if math.isnan(confidence) else confidence
+
+    def get_bounds(self, index: int) -> Tuple[float, float, float, float]:
+        """Bounding box of a word as (left, top, right, bottom)"""
+        left, top, width, height = self.word_boxes[4 * index:4 * index + 4]
+        return left, top, left + width, top + height
+
+    def get_geometry(self, index: int) -> Dict:
+        """Geometry of a word in the Textract format"""
+        left, top, width, height = self.word_boxes[4 * index:4 * index + 4]
+        points = self.word_polygons[self.polygon_offsets[index]:self.polygon_offsets[index + 1]]
+        return {
+            'BoundingBox': {'Width': width, 'Height': height, 'Left': left, 'Top': top},
+            'Polygon': [{'X': points[i], 'Y': points[i + 1]} for i in range(0, len(points), 2)],
+        }
+
+    def get_page_words(self, page_nr: int) -> List[Dict]:
+        """Words of a page as {'Text': ..., 'Id': ...}"""
+        return [{'Text': self.get_text(index), 'Id': str(index + 1)} for index in self.page_words.get(page_nr, ())]
+
+    def get_page_words_with_coords(self, page_nr: int) -> List[Dict]:
+        """Words of a page as {'Text': ..., 'Id': ..., 'Coords': str of the polygon}"""
+        return [{'Text': self.get_text(index), 'Id': str(index + 1),
+                 'Coords': str(self.get_geometry(index)['Polygon'])} for index in self.page_words.get(page_nr, ())]
+
+    def get_word_block(self, index: int) -> Dict:
+        """Word as {'Text': ..., 'Id': ..., 'Page': 1-based page number}"""
+        return {'Text': self.get_text(index), 'Id': str(index + 1), 'Page': self.word_pages[index] + 1}
+
+    def get_page_text(self, page_nr: int) -> str:
+        """Words of a page, each one followed by a space"""
+        return ''.join(self.get_text(index) + ' ' for index in self.page_words.get(page_nr, ()))
+
+    def get_page_lines(self, page_nr: int) -> str:
+        """Lines of a page, each one followed by a new line"""
+        return ''.join(self.get_line_text(index) + '\n' for index in self.page_lines.get(page_nr, ()))
+
+
+class _WordIdView(Mapping):
+    """Read-only mapping of word id (str) to an attribute of the word"""
+
+    def __init__(self, store: OcrWordStore, getter):
+        self.store = store
+        self.getter = getter
+
+    def __getitem__(self, word_id):
+        return self.getter(self.store.get_index(word_id))
+
+    def __iter__(self):
+        return (str(index + 1) for index in range(len(self.store)))
+
+    def __len__(self):
+        return len(self.store)
+
+
+class _WordListView(Sequence):
+    """Read-only list of an attribute of every word, in document order"""
+
+    def __init__(self, store: OcrWordStore, getter):
+        self.store = store
+        self.getter = getter
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.getter(i) for i in range(len(self.store))[index]]
+        return self.getter(range(len(self.store))[index])
+
+    def __len__(self):
+        return len(self.store)
+
+
+class _PageView(Mapping):
+    """
+    Read-only mapping of page number (0-based) to a representation of the page, empty for pages without text.
+    Pages are built on first access only, then cached unless cache is False
+    """
+
+    def __init__(self, store: OcrWordStore, getter, pages_attribute: str = 'page_words', cache: bool = True):
+        self.store = store
+        self.getter = getter
+        self.pages_attribute = pages_attribute
+        self.cache = cache
+        self._pages = {}
+        self._generation = store.generation
+
+    def __getitem__(self, page_nr):
+        if not self.cache:
+            return self.getter(page_nr)
+        if self._generation != self.store.generation:
+            self._pages, self._generation = {}, self.store.generation
+        page = self._pages.get(page_nr)
+        if page is None:
+            page = self._pages[page_nr] = self.getter(page_nr)
+        return page
+
+    def __contains__(self, page_nr):
+        return page_nr in getattr(self.store, self.pages_attribute)
+
+    def __iter__(self):
+        return iter(getattr(self.store, self.pages_attribute))
+
+    def __len__(self):
+        return len(getattr(self.store, self.pages_attribute))
+
+
+def geometry_by_id(store: OcrWordStore) -> Mapping:
+    """Word id to its Textract geometry ({'BoundingBox': ..., 'Polygon': ...})"""
+    return _WordIdView(store, store.get_geometry)
+
+
+def page_by_id(store: OcrWordStore) -> Mapping:
+    """Word id to its page number (0-based)"""
+    return _WordIdView(store, lambda index: store.word_pages[index])
+
+
+def confidence_by_id(store: OcrWordStore) -> Mapping:
+    """Word id to its Textract confidence (None when missing)"""
+    return _WordIdView(store, store.get_confidence)
+
+
+def words_by_page(store: OcrWordStore) -> Mapping:
+    """
+    Page number to the list of its words as {'Text': ..., 'Id': ...}. Not cached, the prompt builder keeps the
+    encoded text of the pages instead of their word dictionaries
+    """
+    return _PageView(store, store.get_page_words, cache=False)
+
+
+def words_with_coords_by_page(store: OcrWordStore) -> Mapping:
+    """Page number to the list of its words as {'Text': ..., 'Id': ..., 'Coords': ...}"""
+    return _PageView(store, store.get_page_words_with_coords)
+
+
+def word_blocks(store: OcrWordStore) -> Sequence:
+    """Every word as {'Text': ..., 'Id': ..., 'Page': ...}, in document order"""
+    return _WordListView(store, store.get_word_block)
+
+
+def text_by_page(store: OcrWordStore) -> Mapping:
+    """Page number to its words joined by spaces"""
+    return _PageView(store, store.get_page_text)
+
+
+def lines_by_page(store: OcrWordStore) -> Mapping:
+    """Page number to its lines joined by new lines"""
+    return _PageView(store, store.get_page_lines, 'page_lines')
@@ -0,0 +1,111 @@
+"""
+OCR word storage benchmark.
+
+Loads the same synthetic Textract blocks into the per-word dictionaries the extraction engine used to build and
+into an OcrWordStore, and reports the build time and the memory each representation retains once built, per
+million words. Blocks are generated before the measurements, so JSON parsing is not part of them.
+
+Usage (from the repository root):
+    python -m src.common.extraction_engine.ocr_word_store_benchmark --pages 100 --words 1000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List
+from ..benchmark_utils import get_commit
+from .ocr_parse_benchmark import generate_blocks
+from .ocr_word_store import OcrWordStore
+
+
+def build_dicts(blocks: List[Dict]) -> Dict[str, Any]:
+    """Structures built by get_ocr_data before OcrWordStore"""
+    ocr = {
+        'ocr_per_page_block': [], 'ocr_per_line_per_page_plain': defaultdict(str),
+        'ocr_per_page_plain': defaultdict(str), 'ocr_per_page_dict_with_coords': defaultdict(list),
+        'ocr_per_page_dict': defaultdict(list), 'ids_to_page_mapping': {}, 'ids_to_coord_mapping': {},
+        'ids_to_confidence_mapping': {},
+    }
+    word_id = 1
+    for block in blocks:
+        if block['BlockType'] == 'WORD':
+            page_nr = int(block['Page']) - 1
+            ocr['ids_to_coord_mapping'][str(word_id)] = block['Geometry']
+            ocr['ids_to_confidence_mapping'][str(word_id)] = block.get('Confidence')
+            ocr['ids_to_page_mapping'][str(word_id)] = page_nr
+            ocr['ocr_per_page_dict'][page_nr].append({'Text': block['Text'], 'Id': str(word_id)})
+            ocr['ocr_per_page_block'].append({'Text': block['Text'], 'Id': str(word_id), 'Page': block['Page']})
+            ocr['ocr_per_page_plain'][page_nr] += block['Text'] + ' '
+            ocr['ocr_per_page_dict_with_coords'][page_nr].append(
+                {'Text': block['Text'], 'Id': str(word_id), 'Coords': str(block['Geometry']['Polygon'])})
+            word_id += 1
+        elif block['BlockType'] == 'LINE':
+            page_nr = int(block['Page']) - 1
+            ocr['ocr_per_line_per_page_plain'][page_nr] += block['Text'] + '\n'
+    return ocr
+
+
+def build_store(blocks: List[Dict]) -> OcrWordStore:
+    store = OcrWordStore()
+    store.load_blocks(blocks)
+    return store
+
+
+def measure(name: str, builder, blocks: str, word_count: int) -> Dict[str, Any]:
+    """
+    Build time and retained memory of one representation, from the blocks as a JSON string. The blocks are parsed
+    before each measurement, so the retained memory only counts what the representation keeps alive (the
+    dictionaries keep the Geometry of the blocks, the store copies what it needs). Build time is measured
+    without tracemalloc, which slows down allocations
+    """
+    parsed_blocks = json.loads(blocks)
+    gc.collect()
+    start = time.perf_counter()
+    builder(parsed_blocks)
+    seconds = time.perf_counter() - start
+
+    parsed_blocks = json.loads(blocks)
+    gc.collect()
+    tracemalloc.start()
+    result = builder(parsed_blocks)
+    del parsed_blocks
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "representation": name,
+        "build_seconds": round(seconds, 3),
+        "retained_mb": round(retained / 1024 / 1024, 1),
+        "seconds_per_million_words": round(seconds * 1e6 / word_count, 2),
+        "mb_per_million_words": round(retained / 1024 / 1024 * 1e6 / word_count, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the OCR word dictionaries with OcrWordStore")
+    parser.add_argument("--pages", type=int, default=100, help="Number of synthetic pages")
+    parser.add_argument("--words", type=int, default=1000, help="Number of synthetic words per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    blocks = json.dumps(list(generate_blocks(args.pages, args.words, args.seed)))
+    word_count = args.pages * args.words
+    results = {
+        "commit": get_commit(),
+        "words": word_count,
+        "results": [measure("dicts", build_dicts, blocks, word_count),
+                    measure("OcrWordStore", build_store, blocks, word_count)],
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import math
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to an estimate from the text length
+    tiktoken = None
+
+from .ocr_encoding import OcrPromptEncoder
+
+# Local tokenizer of each model family, the families without one are estimated with CHARS_PER_TOKEN
+TIKTOKEN_ENCODINGS = {'openai': 'o200k_base'}
+CHARS_PER_TOKEN = {'openai': 4.0, 'claude': 3.5}
+LINES_HEADER = "\n\nThis is the previous text split by lines:\n"
+
+_tokenizers = {}
+
+
+def count_tokens(text: str, model_family: str = 'openai') -> int:
+    """Number of input tokens of a text for a model family, estimated when no local tokenizer is available"""
+    encoding_name = TIKTOKEN_ENCODINGS.get(model_family)
+    if tiktoken is not None and encoding_name:
+        tokenizer = _tokenizers.get(encoding_name)
+        if tokenizer is None:
+            tokenizer = _tokenizers[encoding_name] = tiktoken.get_encoding(encoding_name)
+        return len(tokenizer.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN.get(model_family, 4.0))
+
+
+class MessageBudget(NamedTuple):
+    """Tokens the OCR pages of a message may use for one model"""
+    model_family: str
+    with_ids: bool
+    max_tokens: int
+
+
+class PromptBuilder:
+    """
+    Assembles the extraction messages of page ranges from a single per-page representation of the OCR.
+
+    The text of every page (encoded words, plain words and lines) is built once and shared by the GPT, verifier
+    and re-extraction messages. Token counts are computed per model family and cached per page, so page ranges
+    can be sized to the input budget of every model before any call is made.
+    """
+
+    def __init__(self, prompt_encoder: OcrPromptEncoder, ocr_per_page_dict: Dict, ocr_per_page_plain: Dict,
+                 ocr_per_line_per_page_plain: Dict):
+        """
+        Args:
+            prompt_encoder: Encoder of the words with their ids
+            ocr_per_page_dict: Words with id of every page
+            ocr_per_page_plain: Plain text of every page
+            ocr_per_line_per_page_plain: Text of every page split by lines
+        """
+        self.prompt_encoder = prompt_encoder
+        self.ocr_per_page_dict = ocr_per_page_dict
+        self.ocr_per_page_plain = ocr_per_page_plain
+        self.ocr_per_line_per_page_plain = ocr_per_line_per_page_plain
+        self._encoded_pages = {}
+        self._page_tokens = {}
+
+    @staticmethod
+    def build_header(to_extract) -> str:
+        """Start of the extraction message, listing the fields to extract"""
+        return f"""Extract the following: \n{to_extract} \n\n from the following text: \n"""
+
+    def get_words_text(self, page: int, with_ids: bool = True) -> str:
+        """Words of a page, encoded with their ids or as plain text"""
+        if not with_ids:
+            return self.ocr_per_page_plain[page]
+        encoded_page = self._encoded_pages.get(page)
+        if encoded_page is None:
+            encoded_page = self._encoded_pages[page] = self.prompt_encoder.encode_page(self.ocr_per_page_dict[page])
+        return encoded_page
+
+    def get_ocr_text(self, page_range, with_ids: bool = True) -> str:
+        """Words of a page range, encoded with their ids or as plain text"""
+        if not with_ids:
+            return ''.join(self.ocr_per_page_plain[page] for page in page_range)
+        return self.prompt_encoder.join_pages([self.get_words_text(page) for page in page_range])
+
+    def get_lines_text(self, page_range) -> str:
+        """Text of a page range split by lines, a blank line closing every page"""
+        return ''.join(self.ocr_per_line_per_page_plain[page] + '\n' for page in page_range)
+
+    def get_page_tokens(self, page: int, budget: MessageBudget) -> int:
+        """Tokens a page adds to a message (words and lines)"""
+        key = (page, budget.with_ids, budget.model_family)
+        page_tokens = self._page_tokens.get(key)
+        if page_tokens is None:
+            page_tokens = self._page_tokens[key] = (
+                count_tokens(self.get_words_text(page, budget.with_ids), budget.model_family)
+                + count_tokens(self.ocr_per_line_per_page_plain[page], budget.model_family))
+        return page_tokens
+
+    def split_pages(self, total_pages: int, budgets: List[MessageBudget],
+                    max_pages: Optional[int] = None) -> Iterator[range]:
+        """
+        Group consecutive pages while the messages of every budget still fit
+
+        Args:
+            total_pages: Number of pages of the document
+            budgets: Budgets of the messages built for every page range
+            max_pages: Maximum number of pages of a range
+
+        Returns:
+            Iterator over the page ranges, a page larger than a budget being a range on its own
+        """
+        start = 0
+        range_tokens = [0] * len(budgets)
+        for page in range(total_pages):
+            page_tokens = [self.get_page_tokens(page, budget) for budget in budgets]
+            budget_reached = any(tokens + added > budget.max_tokens
+                                 for tokens, added, budget in zip(range_tokens, page_tokens, budgets))
+            if page > start and (budget_reached or (max_pages and page - start >= max_pages)):
+                yield range(start, page)
+                start, range_tokens = page, [0] * len(budgets)
+            range_tokens = [tokens + added for tokens, added in zip(range_tokens, page_tokens)]
+        yield range(start, total_pages)
+
+    def build_message(self, to_extract, page_range, with_ids: bool = True,
+                      budget: Optional[MessageBudget] = None) -> str:
+        """
+        Build the extraction message of a page range
+
+        Args:
+            to_extract: Fields to extract, with their description
+            page_range: Pages of the message
+            with_ids: Whether the words are encoded with their ids (GPT) or as plain text (verifiers)
+            budget: Budget the pages must fit in, the message is trimmed when they do not
+
+        Returns:
+            Message text
+        """
+        header = self.build_header(to_extract)
+        ocr_text = self.get_ocr_text(page_range, with_ids)
+        if budget is None or sum(self.get_page_tokens(page, budget) for page in page_range) <= budget.max_tokens:
+            return ''.join((header, ocr_text, LINES_HEADER, self.get_lines_text(page_range)))
+
+        # Only a single page can exceed the budget: the lines repeating its words are dropped, then words are cut
+        print(f"WARNING: Pages {list(page_range)} exceed the {budget.max_tokens} tokens budget, trimming the message")
+        ocr_tokens = count_tokens(ocr_text, budget.model_family)
+        if ocr_tokens > budget.max_tokens:
+            ocr_text = ocr_text[:int(len(ocr_text) * budget.max_tokens / ocr_tokens)]
+        return header + ocr_text
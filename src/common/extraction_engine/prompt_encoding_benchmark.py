@@ -0,0 +1,133 @@
+"""
+OCR prompt encoding benchmark.
+
+Builds the GPT extraction prompt and message of every group with each OCR prompt encoder and counts their
+input tokens, so the encodings can be compared per group. Tokens are counted with tiktoken (o200k_base, the
+gpt-4o tokenizer) when it is installed, with an estimate of 4 characters per token otherwise.
+
+Usage (from the repository root):
+    python -m src.common.extraction_engine.prompt_encoding_benchmark --pages 3 --words 400
+    python -m src.common.extraction_engine.prompt_encoding_benchmark --textract textract_output.json
+"""
+import argparse
+import json
+import random
+import re
+from typing import Any, Dict, List, Tuple
+from ..benchmark_utils import get_commit
+from .fields_to_extract import fields, fields_json
+from .ocr_encoding import OCR_PROMPT_ENCODERS
+from .prompt_builder import PromptBuilder, count_tokens, tiktoken
+
+FILLER_WORDS = ["THE", "OF", "VEHICLE", "DEALER", "STATE", "SIGNATURE", "DATE", "NO.", "TOTAL", "$1,250.00",
+                "GEORGIA", "BUYER", "SELLER", "ODOMETER", "MILES", "ADDRESS", "2024", "LLC", "INC", "PAGE"]
+WORDS_PER_LINE = 8
+
+
+def generate_pages(group_name: str, page_count: int, words_per_page: int, seed: int = 0) -> Tuple[List, List]:
+    """
+    Generate synthetic OCR pages holding the labels and example values of the group fields among filler words
+
+    Returns:
+        Tuple of (words of every page as {'Text', 'Id'}, line text of every page)
+    """
+    rnd = random.Random(seed)
+    field_words = []
+    for field, example in fields_json[group_name].items():
+        field_words += field.upper().split('_') + re.sub(r"\[Id: '[^']*']", '', example).split()
+
+    pages_words, pages_lines = [], []
+    word_id = 1
+    for _ in range(page_count):
+        texts = (field_words + [rnd.choice(FILLER_WORDS) for _ in range(max(0, words_per_page - len(field_words)))])
+        texts = texts[:words_per_page]
+        pages_words.append([{'Text': text, 'Id': str(word_id + i)} for i, text in enumerate(texts)])
+        pages_lines.append(''.join(' '.join(texts[start:start + WORDS_PER_LINE]) + '\n'
+                                   for start in range(0, len(texts), WORDS_PER_LINE)))
+        word_id += len(texts)
+    return pages_words, pages_lines
+
+
+def load_textract_pages(path: str) -> Tuple[List, List]:
+    """Read the pages of a Textract output file, numbering the words as get_ocr_data does"""
+    with open(path) as textract_file:
+        ocr_data = json.load(textract_file)
+
+    page_count = ocr_data['DocumentMetadata']['Pages']
+    pages_words = [[] for _ in range(page_count)]
+    pages_lines = ['' for _ in range(page_count)]
+    word_id = 1
+    for block in ocr_data['Blocks']:
+        page_nr = int(block.get('Page', 1)) - 1
+        if block['BlockType'] == 'WORD':
+            pages_words[page_nr].append({'Text': block['Text'], 'Id': str(word_id)})
+            word_id += 1
+        elif block['BlockType'] == 'LINE':
+            pages_lines[page_nr] += block['Text'] + '\n'
+    return pages_words, pages_lines
+
+
+def measure_encoding(encoder_name: str, group_name: str, pages_words: List, pages_lines: List) -> Dict[str, Any]:
+    """Token counts of the extraction prompt and message of a group, built as in FullPageOCRExtractionEngine"""
+    encoder = OCR_PROMPT_ENCODERS[encoder_name]
+    pages_plain = [' '.join(word['Text'] for word in page_words) + ' ' for page_words in pages_words]
+    prompt_builder = PromptBuilder(encoder, dict(enumerate(pages_words)), dict(enumerate(pages_plain)),
+                                   dict(enumerate(pages_lines)))
+    page_range = range(len(pages_words))
+
+    prompt = encoder.extraction_prompt.replace("{json}", json.dumps(fields_json[group_name]))
+    encoded_ocr = prompt_builder.get_ocr_text(page_range)
+    message = prompt_builder.build_message(fields[group_name], page_range)
+
+    prompt_tokens = count_tokens(prompt)
+    message_tokens = count_tokens(message)
+    return {
+        "encoding": encoder_name,
+        "prompt_tokens": prompt_tokens,
+        "ocr_words_tokens": count_tokens(encoded_ocr),
+        "message_tokens": message_tokens,
+        "total_tokens": prompt_tokens + message_tokens,
+    }
+
+
+def run_group(group_name: str, pages_words: List, pages_lines: List) -> Dict[str, Any]:
+    """Measure every encoder for one group, with the reduction of each one against the repr encoding"""
+    results = [measure_encoding(name, group_name, pages_words, pages_lines) for name in OCR_PROMPT_ENCODERS]
+    baseline = next(result["total_tokens"] for result in results if result["encoding"] == "repr")
+    for result in results:
+        result["total_reduction_pct"] = round(100 * (1 - result["total_tokens"] / baseline), 1) if baseline else 0.0
+    return {"group": group_name, "words": sum(len(words) for words in pages_words), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the input tokens of the OCR prompt encodings")
+    parser.add_argument("--groups", nargs="+", choices=sorted(fields_json), default=sorted(fields_json))
+    parser.add_argument("--pages", type=int, default=2, help="Number of synthetic pages per group")
+    parser.add_argument("--words", type=int, default=300, help="Number of synthetic words per page")
+    parser.add_argument("--textract", help="Textract output file used for every group instead of synthetic pages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    groups = []
+    for group_name in args.groups:
+        if args.textract:
+            pages_words, pages_lines = load_textract_pages(args.textract)
+        else:
+            pages_words, pages_lines = generate_pages(group_name, args.pages, args.words, args.seed)
+        groups.append(run_group(group_name, pages_words, pages_lines))
+
+    results = {
+        "commit": get_commit(),
+        "tokenizer": "o200k_base" if tiktoken is not None else "estimate (4 characters per token)",
+        "groups": groups,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,26 @@ The output will be in this JSON format:
 {json}
 
 
+***Not all fields must be present in the documents. Return "NONE" for any field not found. ***
+
+***RETURN THE FINAL JSON OUTPUT, AND ONLY THE JSON OUTPUT USING THE PROVIDED FORMAT***"""
+
+compact_extraction_prompt = """
+You are the lead data analyst working on taking unstructured car invoices and returning a structured JSON output of extracted fields.
+
+The user will give you the name of the fields that need to be extracted in the format:
+
+{field_name1:<description of the field>,
+field_name2:<description of the field>,
+...
+}
+
+The user will then give you the OCR text from the invoices, one page per line. Each word is followed by its unique numerical ID between angle brackets, for instance: MEMOHANDUM⟨1⟩ INVOICE⟨2⟩. Use it to find the fields that need to be extracted. In the output, write the IDs of the words of each value as shown in the output format ([Id: '<ID>']), not between angle brackets.
+
+The output will be in this JSON format:
+{json}
+
+
 ***Not all fields must be present in the documents. Return "NONE" for any field not found. ***
 
 ***RETURN THE FINAL JSON OUTPUT, AND ONLY THE JSON OUTPUT USING THE PROVIDED FORMAT***"""
@@ -105,18 +125,6 @@ Take into account:
 
 Just provide the json as output."""
 
-coord_prompt = """these are the coordinates of separated words:
-{coords}
-
-Generate another set of coordinates of a box surrounding all the words using this JSON format:
-{
-    "x": <value of x coord>,
-    "y": <value of y coord>,
-    "width": <width value>,
-    "height": <height value>
-}
-"""
-
 title_extraction_prompt = """
 
 You are given OCR-extracted text from a PDF containing multiple vehicle titles. Your task is to extract **only the first page** of each unique vehicle title while ensuring that **Vehicle Inquiry documents are excluded**.
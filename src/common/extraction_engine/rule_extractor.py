@@ -0,0 +1,219 @@
+import datetime
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .date_normalizer import normalize_date
+from .ocr_word_store import OcrWordStore
+from .spatial_index import PageSpatialIndex, SpatialIndex, normalize_token
+
+# Words after (or under) a label among which its value is searched, and how far from the label
+MAX_VALUE_WORDS = 3
+RIGHT_OF_DISTANCE = 0.4
+BELOW_DISTANCE = 0.05
+# Anchorless values (found without their label) must have one of the context words of their rule this close
+ANCHORLESS_CONTEXT_DISTANCE = 0.15
+
+VIN_REGEX = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+VIN_TRANSLITERATION = {**{str(digit): digit for digit in range(10)},
+                       **dict(zip('ABCDEFGH', range(1, 9))), **dict(zip('JKLMN', range(1, 6))), 'P': 7, 'R': 9,
+                       **dict(zip('STUVWXYZ', range(2, 10)))}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+YEAR_REGEX = re.compile(r'^(19|20)\d{2}$')
+AMOUNT_REGEX = re.compile(r'^\$?(\d{1,3}(,\d{3})+|\d+)(\.\d{2})?$')
+DATE_REGEX = re.compile(r'^\d{1,4}[/.-]\d{1,2}[/.-]\d{2,4}$')
+DL_NUMBER_REGEX = re.compile(r'^(?=.*\d)[A-Z0-9-]{5,20}$')
+
+# Driver license number formats of the states, after removing the dashes some states print
+DL_NUMBER_FORMATS = {
+    'ALABAMA': r'\d{7,8}', 'CALIFORNIA': r'[A-Z]\d{7}', 'FLORIDA': r'[A-Z]\d{12}', 'GEORGIA': r'\d{7,9}',
+    'ILLINOIS': r'[A-Z]\d{11}', 'MICHIGAN': r'[A-Z]\d{12}', 'NEW JERSEY': r'[A-Z]\d{14}', 'NEW YORK': r'\d{9}',
+    'OHIO': r'[A-Z]{2}\d{6}', 'PENNSYLVANIA': r'\d{8}', 'SOUTH CAROLINA': r'\d{5,11}', 'TENNESSEE': r'\d{7,9}',
+    'TEXAS': r'\d{7,8}', 'VIRGINIA': r'[A-Z]\d{8}|\d{9}',
+}
+
+
+def is_valid_vin(vin: str) -> bool:
+    """17-character VIN whose check digit (9th character) matches its weighted sum"""
+    if not VIN_REGEX.match(vin):
+        return False
+    check_digit = sum(VIN_TRANSLITERATION[character] * weight for character, weight in zip(vin, VIN_WEIGHTS)) % 11
+    return vin[8] == ('X' if check_digit == 10 else str(check_digit))
+
+
+def is_plausible_year(value: str) -> bool:
+    """Vehicle model year, at most 2 years after the current one"""
+    return 1950 <= int(value) <= datetime.date.today().year + 2
+
+
+def is_amount(value: str) -> bool:
+    """Amount written as money ($, cents or thousands separators), so that other numbers are not taken for one"""
+    return '$' in value or '.' in value or ',' in value
+
+
+def detect_state(page_text: str) -> Optional[str]:
+    """State of DL_NUMBER_FORMATS named first on a page"""
+    page_text = page_text.upper()
+    first_state, first_position = None, None
+    for state in DL_NUMBER_FORMATS:
+        match = re.search(rf'\b{state}\b', page_text)
+        if match and (first_position is None or match.start() < first_position):
+            first_state, first_position = state, match.start()
+    return first_state
+
+
+def is_dl_number(value: str, page_text: str) -> bool:
+    """DL number in the format of the state named on the page, or of any known state if none is named"""
+    value = value.replace('-', '')
+    state = detect_state(page_text)
+    formats = [DL_NUMBER_FORMATS[state]] if state else DL_NUMBER_FORMATS.values()
+    return any(re.fullmatch(number_format, value) for number_format in formats)
+
+
+class FieldRule(NamedTuple):
+    """How a field with a rigid format is found: next to one of its labels, matching a pattern and a validator"""
+    labels: Tuple[str, ...]
+    pattern: re.Pattern
+    validator: Optional[Callable[[str, str], bool]] = None  # (value, text of the page) -> whether it is valid
+    anchorless: bool = False  # Values validated by a checksum may be found without their label...
+    context_words: Tuple[str, ...] = ()  # ...if one of these words is close to them
+
+
+def _vin_validator(value: str, page_text: str) -> bool:
+    return is_valid_vin(value)
+
+
+def _year_validator(value: str, page_text: str) -> bool:
+    return is_plausible_year(value)
+
+
+def _amount_validator(value: str, page_text: str) -> bool:
+    return is_amount(value)
+
+
+def _date_validator(value: str, page_text: str) -> bool:
+    return normalize_date(value) is not None
+
+
+# Rules of the fields of fields_to_extract, the other fields are always extracted by the LLM
+FIELD_RULES = {
+    'vin': FieldRule(('VIN', 'VIN NO', 'VEHICLE IDENTIFICATION NO', 'VEHICLE IDENTIFICATION NUMBER', 'SERIAL NO',
+                      'VEHICLE ID'), VIN_REGEX, _vin_validator, anchorless=True,
+                     context_words=('VEHICLE', 'VIN', 'MAKE', 'MODEL', 'YEAR', 'BODY', 'SERIAL')),
+    'year': FieldRule(('YEAR', 'YR', 'MODEL YEAR'), YEAR_REGEX, _year_validator),
+    'sale_price': FieldRule(('SALE PRICE', 'SELLING PRICE', 'SALES PRICE', 'PURCHASE PRICE'), AMOUNT_REGEX,
+                            _amount_validator),
+    'tavt_tax_amount': FieldRule(('TAVT', 'TAVT TAX', 'TAVT AMOUNT'), AMOUNT_REGEX, _amount_validator),
+    'trade_in_value': FieldRule(('TRADE IN VALUE', 'TRADE-IN VALUE', 'TRADE IN ALLOWANCE', 'TRADE-IN ALLOWANCE'),
+                                AMOUNT_REGEX, _amount_validator),
+    'total_amount_due': FieldRule(('TOTAL DUE', 'AMOUNT DUE', 'TOTAL AMOUNT DUE', 'BALANCE DUE'), AMOUNT_REGEX,
+                                  _amount_validator),
+    'date_of_birth': FieldRule(('DOB', 'DATE OF BIRTH', 'BIRTH DATE'), DATE_REGEX, _date_validator),
+    'expiration_date': FieldRule(('EXP', 'EXPIRES', 'EXP DATE', 'EXPIRATION DATE'), DATE_REGEX, _date_validator),
+    'date_of_reassignment': FieldRule(('DATE OF REASSIGNMENT', 'DATE OF SALE', 'DATE OF TRANSFER'), DATE_REGEX,
+                                      _date_validator),
+    'driver_s_license_number': FieldRule(('DLN', 'DL NO', 'DL', 'LICENSE NO', 'LICENSE NUMBER', 'LICENSE #',
+                                          'LIC NO'), DL_NUMBER_REGEX, is_dl_number),
+}
+
+
+class Candidate(NamedTuple):
+    value: str  # Value as matched, words joined without spaces
+    word_indexes: Tuple[int, ...]
+
+
+class RulePreExtractor:
+    """
+    Deterministic extraction of the fields with a rigid format, run before the LLM extraction.
+
+    A field is resolved when the words next to its labels (after them on the same row, else under them) give a
+    single distinct value matching the pattern and validator of the field, read with a Textract confidence of
+    at least confidence_threshold for all its words. Resolved values are formatted as the GPT output, with the
+    id of every word, so their coordinates are computed the same way.
+    """
+
+    def __init__(self, store: OcrWordStore, spatial_index: SpatialIndex, confidence_threshold: float = 95.0,
+                 field_rules: Dict[str, FieldRule] = None):
+        self.store = store
+        self.spatial_index = spatial_index
+        self.confidence_threshold = confidence_threshold
+        self.field_rules = FIELD_RULES if field_rules is None else field_rules
+
+    def match_words(self, rule: FieldRule, word_indexes: List[int], page_text: str) -> Optional[Candidate]:
+        """First word, or pair of consecutive words, of word_indexes whose text is a valid value"""
+        for position, index in enumerate(word_indexes):
+            for word_count in (1, 2):
+                words = tuple(word_indexes[position:position + word_count])
+                if len(words) < word_count:
+                    continue
+                value = ''.join(self.store.get_text(word) for word in words).strip(':;,()[]').upper()
+                if rule.pattern.match(value) and (rule.validator is None or rule.validator(value, page_text)):
+                    return Candidate(value, words)
+        return None
+
+    def find_candidates(self, rule: FieldRule, page_nr: int) -> List[Candidate]:
+        """Values of a field next to its labels on a page, or anywhere on it for the anchorless rules"""
+        page_index = self.spatial_index.get_page(page_nr)
+        page_text = self.store.get_page_text(page_nr)
+        candidates = []
+        for label in rule.labels:
+            for occurrence in page_index.find_label(label):
+                candidate = (self.match_words(rule, page_index.words_right_of(occurrence, RIGHT_OF_DISTANCE)
+                                              [:MAX_VALUE_WORDS], page_text)
+                             or self.match_words(rule, page_index.words_below(occurrence, BELOW_DISTANCE)
+                                                 [:MAX_VALUE_WORDS], page_text))
+                if candidate:
+                    candidates.append(candidate)
+
+        if not candidates and rule.anchorless:
+            # Any token may pass a checksum by chance, it must also be surrounded by words of the field
+            for index in page_index.word_indexes:
+                candidate = self.match_words(rule, [index], page_text)
+                if candidate and self.has_context(rule, page_index, candidate):
+                    candidates.append(candidate)
+        return candidates
+
+    @staticmethod
+    def has_context(rule: FieldRule, page_index: PageSpatialIndex, candidate: Candidate) -> bool:
+        """Whether one of the context words of a rule is within ANCHORLESS_CONTEXT_DISTANCE of a candidate"""
+        context_words = {normalize_token(word) for word in rule.context_words}
+        left, top, right, bottom = page_index.get_bounds(candidate.word_indexes)
+        nearby_words = page_index.words_in_region(left - ANCHORLESS_CONTEXT_DISTANCE, top - ANCHORLESS_CONTEXT_DISTANCE,
+                                                  right + ANCHORLESS_CONTEXT_DISTANCE,
+                                                  bottom + ANCHORLESS_CONTEXT_DISTANCE, mode='overlap')
+        return any(normalize_token(page_index.store.get_text(index)) in context_words
+                   for index in nearby_words if index not in candidate.word_indexes)
+
+    def resolve_field(self, field: str, page_range: Iterable[int]) -> Optional[Candidate]:
+        """Single confident value of a field in a page range, None if it is not found or ambiguous"""
+        rule = self.field_rules.get(field)
+        if rule is None:
+            return None
+        candidates = [candidate for page_nr in page_range for candidate in self.find_candidates(rule, page_nr)]
+        if not candidates or len({candidate.value for candidate in candidates}) > 1:
+            return None
+
+        candidate = candidates[0]
+        confidences = [self.store.get_confidence(index) for index in candidate.word_indexes]
+        if None in confidences or min(confidences) < self.confidence_threshold:
+            return None
+        return candidate
+
+    def extract(self, fields: Iterable[str], page_range: Iterable[int]) -> Dict[str, str]:
+        """
+        Resolve the fields of a group in a page range
+
+        Args:
+            fields: Names of the fields to extract
+            page_range: Pages (0-based) to search
+
+        Returns:
+            Resolved fields, as in the GPT output: the text of every word followed by its id ([Id: '17'])
+        """
+        page_range = list(page_range)
+        resolved_fields = {}
+        for field in fields:
+            candidate = self.resolve_field(field, page_range)
+            if candidate is not None:
+                resolved_fields[field] = ' '.join(
+                    f"{self.store.get_text(index).strip(':;,()[]')} [Id: '{index + 1}']"
+                    for index in candidate.word_indexes)
+        return resolved_fields
@@ -0,0 +1,179 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+from .ocr_word_store import OcrWordStore
+
+# Cells per side of the grid of a page, Textract coordinates being ratios of the page size (0 to 1)
+GRID_SIZE = 32
+# How a word is matched by a region: its center is inside, its box overlaps it, or its box is fully inside it
+REGION_MODES = ('center', 'overlap', 'inside')
+
+Bounds = Tuple[float, float, float, float]  # (left, top, right, bottom)
+
+
+def normalize_token(text: str) -> str:
+    """Lowercase text without punctuation, so 'VIN:' or 'Vin.' match the label 'VIN'"""
+    return re.sub(r'[^0-9a-z#]', '', text.lower())
+
+
+class PageSpatialIndex:
+    """
+    Uniform grid over the word boxes of one page of an OcrWordStore.
+
+    Every word is registered in the cells its box overlaps, so a region query only tests the words of the cells
+    the region covers. Queries return word indexes of the store (the word id being index + 1).
+    """
+
+    def __init__(self, store: OcrWordStore, page_nr: int, grid_size: int = GRID_SIZE):
+        self.store = store
+        self.page_nr = page_nr
+        self.grid_size = grid_size
+        self.word_indexes = store.page_words.get(page_nr, ())
+        self.cells = defaultdict(list)
+        self._token_positions = None  # Positions of every normalized word text, computed by the first find_label
+        self._tokens = None
+        cells, last_cell, boxes = self.cells, grid_size - 1, store.word_boxes
+        for index in self.word_indexes:
+            left, top, width, height = boxes[4 * index:4 * index + 4]
+            first_col, last_col = int(left * grid_size), int((left + width) * grid_size)
+            first_row, last_row = int(top * grid_size), int((top + height) * grid_size)
+            for col in range(max(0, first_col), min(last_cell, last_col) + 1):
+                for row in range(max(0, first_row), min(last_cell, last_row) + 1):
+                    cells[(col, row)].append(index)
+
+    def _cell(self, coordinate: float) -> int:
+        return min(self.grid_size - 1, max(0, int(coordinate * self.grid_size)))
+
+    def words_in_region(self, left: float, top: float, right: float, bottom: float,
+                        mode: str = 'center') -> List[int]:
+        """
+        Words of a region of the page
+
+        Args:
+            left, top, right, bottom: Region, in Textract coordinates
+            mode: One of REGION_MODES
+
+        Returns:
+            Indexes of the words in the region, in document order
+        """
+        if mode not in REGION_MODES:
+            raise ValueError(f"Unknown region mode: {mode}, expected one of {REGION_MODES}")
+        candidates = set()
+        for col in range(self._cell(left), self._cell(right) + 1):
+            for row in range(self._cell(top), self._cell(bottom) + 1):
+                candidates.update(self.cells.get((col, row), ()))
+
+        found = []
+        for index in candidates:
+            word_left, word_top, word_right, word_bottom = self.store.get_bounds(index)
+            if mode == 'center':
+                center_x, center_y = (word_left + word_right) / 2, (word_top + word_bottom) / 2
+                matched = left <= center_x <= right and top <= center_y <= bottom
+            elif mode == 'overlap':
+                matched = word_left <= right and word_right >= left and word_top <= bottom and word_bottom >= top
+            else:
+                matched = left <= word_left and word_right <= right and top <= word_top and word_bottom <= bottom
+            if matched:
+                found.append(index)
+        return sorted(found)
+
+    def find_label(self, label: str) -> List[List[int]]:
+        """
+        Occurrences of a label on the page, matched word by word ignoring case and punctuation
+
+        Returns:
+            Word indexes of every occurrence, in document order
+        """
+        label_tokens = [token for token in map(normalize_token, label.split()) if token]
+        if not label_tokens:
+            return []
+        if self._tokens is None:
+            tokens = [(index, normalize_token(self.store.get_text(index))) for index in self.word_indexes]
+            self._tokens = [(index, token) for index, token in tokens if token]
+            self._token_positions = defaultdict(list)
+            for position, (_, token) in enumerate(self._tokens):
+                self._token_positions[token].append(position)
+
+        words = self._tokens
+        occurrences = []
+        for start in self._token_positions.get(label_tokens[0], ()):
+            candidate = words[start:start + len(label_tokens)]
+            if [token for _, token in candidate] == label_tokens:
+                occurrences.append([index for index, _ in candidate])
+        return occurrences
+
+    def get_bounds(self, word_indexes: Sequence[int]) -> Bounds:
+        """Box surrounding several words"""
+        bounds = [self.store.get_bounds(index) for index in word_indexes]
+        return (min(bound[0] for bound in bounds), min(bound[1] for bound in bounds),
+                max(bound[2] for bound in bounds), max(bound[3] for bound in bounds))
+
+    def words_right_of(self, label_indexes: Sequence[int], max_distance: float = 1.0,
+                       tolerance: float = 0.5) -> List[int]:
+        """
+        Words on the same row as a label, after it
+
+        Args:
+            label_indexes: Words of the label, as returned by find_label
+            max_distance: Maximum horizontal distance from the end of the label
+            tolerance: Vertical margin of the row around the label, as a ratio of the label height
+
+        Returns:
+            Word indexes sorted from left to right
+        """
+        left, top, right, bottom = self.get_bounds(label_indexes)
+        margin = (bottom - top) * tolerance
+        words = [index for index in self.words_in_region(right, top - margin, right + max_distance, bottom + margin)
+                 if index not in label_indexes]
+        return sorted(words, key=lambda index: self.store.get_bounds(index)[0])
+
+    def words_below(self, label_indexes: Sequence[int], max_distance: float = 0.1,
+                    tolerance: float = 0.5) -> List[int]:
+        """
+        Words under a label, overlapping its columns
+
+        Args:
+            label_indexes: Words of the label, as returned by find_label
+            max_distance: Maximum vertical distance from the bottom of the label
+            tolerance: Horizontal margin around the label, as a ratio of the label width
+
+        Returns:
+            Word indexes sorted from top to bottom, then left to right
+        """
+        left, top, right, bottom = self.get_bounds(label_indexes)
+        margin = (right - left) * tolerance
+        words = self.words_in_region(left - margin, bottom, right + margin, bottom + max_distance, mode='overlap')
+        # Words of the label row slightly lower than the label also overlap the region, they must start below it
+        words = [index for index in words
+                 if index not in label_indexes and self.store.get_bounds(index)[1] >= (top + bottom) / 2]
+        return sorted(words, key=lambda index: (self.store.get_bounds(index)[1], self.store.get_bounds(index)[0]))
+
+
+class SpatialIndex:
+    """Spatial indexes of the pages of an OcrWordStore, each one built on first use like the page views"""
+
+    def __init__(self, store: OcrWordStore, grid_size: int = GRID_SIZE):
+        self.store = store
+        self.grid_size = grid_size
+        self._pages: Dict[int, PageSpatialIndex] = {}
+        self._generation = store.generation
+
+    def get_page(self, page_nr: int) -> PageSpatialIndex:
+        """Index of a page (0-based)"""
+        if self._generation != self.store.generation:
+            self._pages, self._generation = {}, self.store.generation
+        page_index = self._pages.get(page_nr)
+        if page_index is None:
+            page_index = self._pages[page_nr] = PageSpatialIndex(self.store, page_nr, self.grid_size)
+        return page_index
+
+    def find_label(self, label: str, pages: Sequence[int] = None) -> List[Tuple[int, List[int]]]:
+        """
+        Occurrences of a label in some pages (every page by default)
+
+        Returns:
+            (page number, word indexes) of every occurrence
+        """
+        if pages is None:
+            pages = sorted(self.store.page_words)
+        return [(page_nr, occurrence) for page_nr in pages for occurrence in self.get_page(page_nr).find_label(label)]
@@ -0,0 +1,107 @@
+"""
+Spatial index benchmark.
+
+Lays out a synthetic form page (rows of words with labels such as 'VIN' followed by their value) in an
+OcrWordStore, and reports the time to build the PageSpatialIndex of the page and the mean time of its queries,
+next to a scan of every word of the page for the same regions.
+
+Usage (from the repository root):
+    python -m src.common.extraction_engine.spatial_index_benchmark --words 2000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict
+from ..benchmark_utils import get_commit
+from .ocr_word_store import OcrWordStore
+from .prompt_encoding_benchmark import FILLER_WORDS
+from .spatial_index import PageSpatialIndex
+
+LABELS = ["VIN", "YEAR", "MAKE", "MODEL", "SALE PRICE", "BUYER NAME"]
+WORDS_PER_ROW = 12
+
+
+def build_page(word_count: int, seed: int = 0) -> OcrWordStore:
+    """Single page of word_count words, in rows starting with a label every 4 rows"""
+    rnd = random.Random(seed)
+    store = OcrWordStore()
+    rows = -(-word_count // WORDS_PER_ROW)
+    row_height = 1.0 / rows
+    word_width = 1.0 / WORDS_PER_ROW
+    for i in range(word_count):
+        row, col = divmod(i, WORDS_PER_ROW)
+        label = LABELS[(row // 4) % len(LABELS)].split()
+        text = label[col] if row % 4 == 0 and col < len(label) else rnd.choice(FILLER_WORDS)
+        left, top = col * word_width, row * row_height
+        width, height = word_width * 0.9, row_height * 0.8
+        store.add_word(text, 0, {
+            'BoundingBox': {'Left': left, 'Top': top, 'Width': width, 'Height': height},
+            'Polygon': [{'X': left, 'Y': top}, {'X': left + width, 'Y': top},
+                        {'X': left + width, 'Y': top + height}, {'X': left, 'Y': top + height}],
+        }, 99.0)
+    store.finalize()
+    return store
+
+
+def scan_region(store: OcrWordStore, left: float, top: float, right: float, bottom: float):
+    """Region query without index: center test over every word of the page"""
+    found = []
+    for index in store.page_words.get(0, ()):
+        word_left, word_top, word_right, word_bottom = store.get_bounds(index)
+        if left <= (word_left + word_right) / 2 <= right and top <= (word_top + word_bottom) / 2 <= bottom:
+            found.append(index)
+    return found
+
+
+def time_per_call(function, arguments, repeat: int = 1) -> float:
+    """Mean milliseconds of a call over a list of argument tuples"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in arguments:
+            function(*args)
+    return round((time.perf_counter() - start) * 1000 / (repeat * len(arguments)), 4)
+
+
+def run_benchmark(word_count: int, queries: int, seed: int = 0) -> Dict[str, Any]:
+    store = build_page(word_count, seed)
+    start = time.perf_counter()
+    page_index = PageSpatialIndex(store, 0)
+    build_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    rnd = random.Random(seed)
+    regions = []
+    for _ in range(queries):
+        left, top = rnd.random() * 0.8, rnd.random() * 0.9
+        regions.append((left, top, left + 0.2, top + 0.05))
+    labels = [occurrence for label in LABELS for occurrence in page_index.find_label(label)]
+
+    return {
+        "words": word_count,
+        "build_ms": build_ms,
+        "words_in_region_ms": time_per_call(page_index.words_in_region, regions),
+        "scan_region_ms": time_per_call(lambda *region: scan_region(store, *region), regions),
+        "find_label_ms": time_per_call(page_index.find_label, [(label,) for label in LABELS], 10),
+        "words_right_of_ms": time_per_call(page_index.words_right_of, [(label,) for label in labels]),
+        "words_below_ms": time_per_call(page_index.words_below, [(label,) for label in labels]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the spatial index queries on a synthetic page")
+    parser.add_argument("--words", type=int, default=2000, help="Number of words of the page")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of random region queries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = {"commit": get_commit(), **run_benchmark(args.words, args.queries, args.seed)}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import asyncio
+import time
 import traceback
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from ..ocr_extraction_engine_abs import OCRExtractionEngine
 import requests
@@ -7,186 +10,472 @@ import json
 from dataclasses import dataclass
 import os
 from ....llm_helper.llm_factory import LLMModelFactory
+from ....llm_helper.llm.cached_model import CachedModel
+from ....llm_helper.llm_response_cache import LLMResponseCache
 from ....llm_helper.llm_models import LLMModel
 import re
 from ....aria_helper.boto3_utils import get_secret
-from ...prompts import extraction_prompt, date_transformer, coord_prompt
+from ...prompts import extraction_prompt, date_transformer
+from ...bounding_box import merge_word_boxes
+from ...date_normalizer import normalize_date
+from ...verification_triage import score_field, select_uncertain_fields
+from ...chunk_merger import merge_chunk_fields
+from ...ocr_encoding import get_ocr_prompt_encoder
+from ...prompt_builder import MessageBudget, PromptBuilder, count_tokens
+from ...textract_stream import iter_textract_blocks
+from ...spatial_index import SpatialIndex
+from ...rule_extractor import RulePreExtractor
+from ...ocr_word_store import (OcrWordStore, confidence_by_id, geometry_by_id, lines_by_page, page_by_id,
+                               text_by_page, word_blocks, words_by_page, words_with_coords_by_page)
 from ...fields_to_extract import fields, fields_json, fields_json_v2, fields_type
 
 common_prefix = os.environ['COMMON_PREFIX']
+# Word id citations, as in the output format ([Id: '17']) or copied from the compact OCR encoding (⟨17⟩)
+id_regex_pattern = r"(?:\[Id: '|⟨)([0-9a-z-]*)(?:']|⟩)"
+ocr_prompt_encoding = os.environ.get('OCR_PROMPT_ENCODING', 'repr')  # See ocr_encoding.OCR_PROMPT_ENCODERS
+llm_secret_ttl = int(os.environ.get('LLM_SECRET_TTL_SECONDS', 300))
+llm_response_cache_ttl = int(os.environ.get('LLM_RESPONSE_CACHE_TTL_SECONDS', 86400))  # 0 disables the cache
+# Fields scoring below this in the verification triage are sent to the verifiers. Above 100 the triage is disabled:
+# every field is verified and the verifiers run alongside GPT instead of waiting for its output
+verification_confidence_threshold = float(os.environ.get('VERIFICATION_CONFIDENCE_THRESHOLD', 90))
+verification_triage = verification_confidence_threshold <= 100
+# Long documents are split in page ranges of at most this many tokens (GPT message), extracted in parallel
+extraction_chunk_token_budget = int(os.environ.get('EXTRACTION_CHUNK_TOKEN_BUDGET', 60000))
+# Input tokens accepted by each of the used LLMs, prompt included, and the tokenizer family counting them
+llm_input_token_budgets = {"gpt": 120000, "aux1": 190000, "aux2": 190000,
+                           **json.loads(os.environ.get('LLM_INPUT_TOKEN_BUDGETS', '{}'))}
+llm_model_families = {"gpt": "openai", "aux1": "claude", "aux2": "claude"}
+# Textract outputs are parsed while they are downloaded instead of being loaded whole in memory
+ocr_streaming_parse = os.environ.get('OCR_STREAMING_PARSE', 'true').lower() == 'true'
+ocr_stream_chunk_size = int(os.environ.get('OCR_STREAM_CHUNK_SIZE', 1024 * 1024))
+extraction_max_workers = int(os.environ.get('EXTRACTION_MAX_WORKERS', 4))
+extraction_merge_policy = os.environ.get('EXTRACTION_MERGE_POLICY', 'first_found')  # See chunk_merger
+# Fields with a rigid format (VIN, year, amounts, dates, DL number) are first searched next to their labels, only
+# the fields not resolved with at least this Textract confidence are extracted by the LLMs
+rule_pre_extraction = os.environ.get('RULE_PRE_EXTRACTION', 'true').lower() == 'true'
+rule_pre_extraction_confidence = float(os.environ.get('RULE_PRE_EXTRACTION_CONFIDENCE', 95))
+
+# Process-level state reused across warm invocations
+llm_secret_cache = {"secret": None, "expires_at": 0}
+
+
+def get_llm_secret():
+    """Returns the llm_params secret, read again from Secrets Manager once the TTL expires to pick up rotations."""
+    now = time.monotonic()
+    if llm_secret_cache["secret"] is None or now >= llm_secret_cache["expires_at"]:
+        llm_secret_cache["secret"] = get_secret(f'{common_prefix}-llm_params')
+        llm_secret_cache["expires_at"] = now + llm_secret_ttl
+    return llm_secret_cache["secret"]
 
 
 @dataclass
 class FullPageOCRExtractionEngine(OCRExtractionEngine):
     mongo_client: Any
     group_name: str
+    rule_index: Any = None  # Validation rules of the app, used by the verification triage when available
+    bypass_llm_cache: bool = False  # Reprocessing: the LLMs are called again, their responses replace the cached ones
     llm_factory = LLMModelFactory()
 
     def __post_init__(self):
         if not self.mongo_client:
             raise ValueError('mongo_client is not set while creating the engine')
         self.group_pages_list = None
-        self.ocr_per_page_block = []  # contains all test id and page
+        self.llms_wapper_map = {}  # Used LLMs, set by process_data
         self.total_pages = None
-        self.ocr_per_line_per_page_plain = defaultdict(str)  # contains lines for each page
-        self.ocr_per_page_plain = defaultdict(str)  # contains text for each page
-        self.ocr_per_page_dict_with_coords = defaultdict(list)  # contains text id with coords for each page
-        self.ocr_per_page_dict = defaultdict(list)  # text with id for each page
-        self.ids_to_page_mapping = {}  # This is to store id and coordinates
-        self.ids_to_coord_mapping = {}  # This is to store id and coordinates
+        # Words and lines of the document. The dictionaries below are read-only views over it, each page being built
+        # on first access: get_ocr_data only parses, and the representations no prompt uses are never built
+        self.ocr_words = OcrWordStore()
+        self.ocr_per_page_block = word_blocks(self.ocr_words)  # contains all test id and page
+        self.ocr_per_line_per_page_plain = lines_by_page(self.ocr_words)  # contains lines for each page
+        self.ocr_per_page_plain = text_by_page(self.ocr_words)  # contains text for each page
+        self.ocr_per_page_dict_with_coords = words_with_coords_by_page(self.ocr_words)  # text id with coords per page
+        self.ocr_per_page_dict = words_by_page(self.ocr_words)  # text with id for each page
+        self.ids_to_page_mapping = page_by_id(self.ocr_words)  # This is to store id and page
+        self.ids_to_coord_mapping = geometry_by_id(self.ocr_words)  # This is to store id and coordinates
+        self.ids_to_confidence_mapping = confidence_by_id(self.ocr_words)  # This is to store id and Textract confidence
+        self.spatial_index = SpatialIndex(self.ocr_words)  # Word boxes of every page, for layout queries
+        self.rule_extractor = RulePreExtractor(self.ocr_words, self.spatial_index, rule_pre_extraction_confidence)
+        self.prompt_encoder = get_ocr_prompt_encoder(ocr_prompt_encoding)  # Format of the OCR words in the prompt
+        self.prompt_builder = PromptBuilder(self.prompt_encoder, self.ocr_per_page_dict, self.ocr_per_page_plain,
+                                            self.ocr_per_line_per_page_plain)
+        self.message_budgets = None  # Budgets of the GPT and verifier messages, see get_message_budgets
+        self.unparsed_dates = {}  # Date fields normalize_date could not parse, transformed later by the LLM
+        self.llm_response_cache = None  # LLM responses already received, so retries only repeat failed calls
+        if llm_response_cache_ttl > 0:
+            self.llm_response_cache = LLMResponseCache(
+                self.mongo_client.client[os.environ.get('DATABASE_NAME')][
+                    os.environ.get('LLM_RESPONSE_CACHE_COLLECTION_NAME', 'llm_response_cache')],
+                llm_response_cache_ttl)
 
     def get_used_llm_dict(self):
-        llm_secret = get_secret(f'{common_prefix}-llm_params')
-        return {
-            "gpt": self.llm_factory.get_llm_model(LLMModel.OPENAI, llm_secret['openai']['public']['gpt4o']['llm_params']),
-            "gpt_mini": self.llm_factory.get_llm_model(LLMModel.OPENAI,
-                                                       llm_secret['openai']['public']['gpt4o3-mini']['llm_params']),
-            "aux1": self.llm_factory.get_llm_model(LLMModel.BEDROCK,
-                                                   llm_secret['bedrock']['claude']['claude3.7-sonnet']['llm_params']),
-            "aux2": self.llm_factory.get_llm_model(LLMModel.BEDROCK,
-                                                   llm_secret['bedrock']['claude']['claude3.5-sonnet']['llm_params']),
+        # Clients come from the factory registry, built once per container and shared by all groups and page ranges
+        llm_secret = get_llm_secret()
+        used_llms = {
+            "gpt": self.llm_factory.get_registered_llm_model(
+                LLMModel.OPENAI, llm_secret['openai']['public']['gpt4o']['llm_params']),
+            "aux1": self.llm_factory.get_registered_llm_model(
+                LLMModel.BEDROCK, llm_secret['bedrock']['claude']['claude3.7-sonnet']['llm_params']),
+            "aux2": self.llm_factory.get_registered_llm_model(
+                LLMModel.BEDROCK, llm_secret['bedrock']['claude']['claude3.5-sonnet']['llm_params']),
         }
+        if self.llm_response_cache is None:
+            return used_llms
+        return {name: CachedModel(model, self.llm_response_cache, self.bypass_llm_cache)
+                for name, model in used_llms.items()}
 
     def get_ocr_data(self, link_to_download):
-        r = requests.get(link_to_download)
-        ocr_data = json.loads(r.content.decode('utf-8'))
-        self.total_pages = ocr_data['DocumentMetadata']['Pages']
-        word_id = 1
-        for block in ocr_data['Blocks']:
-            if block['BlockType'] == 'WORD':
-                page_nr = int(block['Page']) - 1
-                self.ids_to_coord_mapping[str(word_id)] = block['Geometry']
-                self.ids_to_page_mapping[str(word_id)] = page_nr
-                self.ocr_per_page_dict[page_nr].append({'Text': block['Text'], 'Id': str(word_id)})
-                self.ocr_per_page_block.append({'Text': block['Text'], 'Id': str(word_id), 'Page': block['Page']})
-                self.ocr_per_page_plain[page_nr] += block['Text'] + ' '
-                self.ocr_per_page_dict_with_coords[page_nr].append(
-                    {'Text': block['Text'], 'Id': str(word_id), 'Coords': str(block['Geometry']['Polygon'])})
-                word_id += 1
-            elif block['BlockType'] == 'LINE':
-                page_nr = int(block['Page']) - 1
-                self.ocr_per_line_per_page_plain[page_nr] += block['Text'] + '\n'
+        if ocr_streaming_parse:
+            # Blocks are processed as they are parsed from the HTTP stream, the document tree is never built
+            metadata = {}
+            with requests.get(link_to_download, stream=True) as r:
+                self.load_ocr_blocks(iter_textract_blocks(r.iter_content(chunk_size=ocr_stream_chunk_size), metadata))
+            self.total_pages = metadata['DocumentMetadata']['Pages']
+        else:
+            r = requests.get(link_to_download)
+            ocr_data = json.loads(r.content.decode('utf-8'))
+            self.total_pages = ocr_data['DocumentMetadata']['Pages']
+            self.load_ocr_blocks(ocr_data['Blocks'])
+
+    def load_ocr_blocks(self, blocks):
+        # Words are numbered from 1 in document order, the number being the id cited by the LLMs
+        self.ocr_words.load_blocks(blocks)
+
+    def get_message_budgets(self):
+        """
+        Tokens the OCR pages of the GPT message and of the verifiers message may use: the input budget of the
+        model minus its prompt and the message header (the GPT message is also capped by the chunk budget)
+        """
+        if self.message_budgets is None:
+            header = self.prompt_builder.build_header(fields[self.group_name])
+            prompts = {"gpt": self.build_extraction_prompt(), "aux1": self.build_verification_prompt(None),
+                       "aux2": self.build_verification_prompt(None)}
+            budgets = {}
+            for llm_name, prompt in prompts.items():
+                model_family = llm_model_families[llm_name]
+                max_tokens = llm_input_token_budgets[llm_name] - count_tokens(prompt + header, model_family)
+                budgets[llm_name] = MessageBudget(model_family, llm_name == "gpt", max_tokens)
+            budgets["gpt"] = budgets["gpt"]._replace(
+                max_tokens=min(budgets["gpt"].max_tokens, extraction_chunk_token_budget))
+            self.message_budgets = budgets
+        return self.message_budgets
 
     def page_groups_generator(self, classify_needed: bool):
-        if not classify_needed:
-            yield range(self.total_pages)
-        else:
-            for i in range(0, self.total_pages, 10):
-                yield range(i, min(i + 10, self.total_pages))
+        # Consecutive pages are grouped while the GPT and verifier messages fit their budgets (at most 10 pages if
+        # classifying)
+        yield from self.prompt_builder.split_pages(self.total_pages, list(self.get_message_budgets().values()),
+                                                   10 if classify_needed else None)
+
+    def build_extraction_prompt(self, fields_to_extract=None):
+        # Prompt of the GPT extraction, describing the OCR format of the encoder, narrowed to fields_to_extract
+        fields_example = fields_json[self.group_name]
+        if fields_to_extract is not None:
+            fields_example = {field: value for field, value in fields_example.items() if field in fields_to_extract}
+        return self.prompt_encoder.extraction_prompt.replace("{json}", json.dumps(fields_example))
+
+    def build_messages(self, page_range, fields_to_extract=None):
+        # GPT and verifier messages share the per-page texts of the prompt builder
+        budgets = self.get_message_budgets()
+        to_extract = fields[self.group_name]
+        if fields_to_extract is not None:
+            to_extract = {field: value for field, value in to_extract.items() if field in fields_to_extract}
+        message = self.prompt_builder.build_message(to_extract, page_range, True, budgets["gpt"])
+        message_without_ids = self.prompt_builder.build_message(to_extract, page_range, False,
+                                                                min(budgets["aux1"], budgets["aux2"],
+                                                                    key=lambda budget: budget.max_tokens))
+        return message, message_without_ids
 
     def process_data(self, classify_needed, execution_id: str):
-        for index, page_range in enumerate(self.page_groups_generator(classify_needed)):
-            raw_text_ocr = [self.ocr_per_page_dict[page] for page in page_range]
-            raw_text_plain = ''.join([self.ocr_per_page_plain[page] for page in page_range])
-
-            to_extract = fields[self.group_name]
-            self.llms_wapper_map = self.get_used_llm_dict()
-
-            # Calling GPT to extract data
-            message = f"""Extract the following: \n{to_extract} \n\n from the following text: \n{raw_text_ocr}\n\nThis is the previous text split by lines:\n"""
-            message_without_ids = f"""Extract the following: \n{to_extract} \n\n from the following text: \n{raw_text_plain}\n\nThis is the previous text split by lines:\n"""
-            for page in page_range:
-                message += "\n".join(self.ocr_per_line_per_page_plain[page].split("\n")) + "\n"
-                message_without_ids += "\n".join(self.ocr_per_line_per_page_plain[page].split("\n")) + "\n"
-
-            gpt_output = self.llms_wapper_map['gpt'].send_message_to_llm(
-                prompt=extraction_prompt.replace("{json}", json.dumps(fields_json[self.group_name])),
-                message=message)
-
-            self.mongo_client.select_db_and_collection(db_name=os.environ.get('DATABASE_NAME'),
-                                                       collection_name=os.environ["LLM_EXTRACTOR_COLLECTION_NAME"])
-            self.mongo_client.update_one(filter={'execution_id': execution_id},
-                                         data={"$set": {f"{self.group_name}.extracted_data_gpt4": gpt_output}})
-            return self.validate_gpt_output(index, gpt_output, message_without_ids, execution_id, raw_text_ocr, to_extract)
-
-    def recursive_validation(self, message_without_ids, execution_id):
-        llm_call_error = True
-        retry_calling = 1
-        claude_output = None
-        llama3_output = None
-        while llm_call_error == True and retry_calling > 0:
-            try:
-                # Calling Claude3 Haiku to extract data
-                claude_output = self.llms_wapper_map['aux1'].send_message_to_llm(
-                    prompt=extraction_prompt.replace("{json}", json.dumps(fields_json_v2[self.group_name])),
-                    message=message_without_ids)
-                self.mongo_client.update_one(filter={'execution_id': execution_id},
-                                             data={
-                                                 "$set": {f"{self.group_name}.extracted_data_claude3": claude_output}})
-
-                # Calling Llama3 8b to extract data
-                llama3_output = self.llms_wapper_map['aux2'].send_message_to_llm(
-                    prompt=extraction_prompt.replace("{json}", json.dumps(fields_json_v2[self.group_name])),
-                    message=message_without_ids)
-                self.mongo_client.update_one(filter={'execution_id': execution_id},
-                                             data={"$set": {f"{self.group_name}.extracted_data_llama3": llama3_output}})
-
-                llm_call_error = False
-
-            except Exception as e:
-                llm_call_error = True
-                retry_calling -= 1
-        return claude_output, llama3_output
+        self.llms_wapper_map = self.get_used_llm_dict()
+        self.mongo_client.select_db_and_collection(db_name=os.environ.get('DATABASE_NAME'),
+                                                   collection_name=os.environ["LLM_EXTRACTOR_COLLECTION_NAME"])
+
+        # Page ranges are extracted in parallel, each one with its own GPT and verifier calls
+        page_ranges = list(self.page_groups_generator(classify_needed))
+        with ThreadPoolExecutor(max_workers=max(1, min(extraction_max_workers, len(page_ranges)))) as executor:
+            chunk_results = list(executor.map(lambda chunk: self.extract_page_range(*chunk, execution_id),
+                                              enumerate(page_ranges)))
+        return self.build_extraction_result(chunk_results, id_regex_pattern)
+
+    def extract_page_range(self, index, page_range, execution_id):
+        # Fields resolved by the rules are not asked to the LLMs, GPT is not called if they are all resolved
+        pre_extracted_fields, fields_to_extract = self.pre_extract_fields(page_range, execution_id, index)
+        message, message_without_ids = self.build_messages(page_range, fields_to_extract)
+
+        if not verification_triage:
+            # Every field left to the LLMs is verified, the verifiers are called while GPT extracts
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                verifier_future = executor.submit(self.recursive_validation, message_without_ids, execution_id,
+                                                  fields_to_extract, index)
+                gpt_output = self.extract_with_gpt(index, message, execution_id, pre_extracted_fields,
+                                                   fields_to_extract)
+            return self.validate_gpt_output(gpt_output, verifier_future.result())
+
+        gpt_output = self.extract_with_gpt(index, message, execution_id, pre_extracted_fields, fields_to_extract)
+
+        # Only the fields GPT is not confident about are re-extracted by the verifiers
+        fields_to_verify = self.select_fields_to_verify(gpt_output, execution_id, index, pre_extracted_fields)
+        verifier_outputs = self.recursive_validation(message_without_ids, execution_id, fields_to_verify, index)
+
+        return self.validate_gpt_output(gpt_output, verifier_outputs)
+
+    def extract_with_gpt(self, index, message, execution_id, pre_extracted_fields, fields_to_extract):
+        # GPT extraction of the fields the rules did not resolve, merged with the resolved ones
+        gpt_output = '{}'
+        if fields_to_extract is None or fields_to_extract:
+            gpt_output = self.send_and_store(
+                'gpt', self.build_extraction_prompt(fields_to_extract), message, execution_id,
+                self.get_output_key('extracted_data_gpt4', index))
+        return self.merge_pre_extracted_fields(gpt_output, pre_extracted_fields)
+
+    async def process_data_async(self, classify_needed, execution_id: str):
+        """
+        Asyncio version of process_data: extraction and verifier calls are awaited instead of
+        holding a thread each, so several groups can be processed concurrently in one event loop
+        """
+        self.llms_wapper_map = self.get_used_llm_dict()
+        self.mongo_client.select_db_and_collection(db_name=os.environ.get('DATABASE_NAME'),
+                                                   collection_name=os.environ["LLM_EXTRACTOR_COLLECTION_NAME"])
+
+        page_ranges = list(self.page_groups_generator(classify_needed))
+        semaphore = asyncio.Semaphore(max(1, extraction_max_workers))
+
+        async def extract_with_limit(index, page_range):
+            async with semaphore:
+                return await self.extract_page_range_async(index, page_range, execution_id)
+
+        chunk_results = await asyncio.gather(*(extract_with_limit(index, page_range)
+                                               for index, page_range in enumerate(page_ranges)))
+        return self.build_extraction_result(list(chunk_results), id_regex_pattern)
+
+    async def close_async_clients(self):
+        # The async clients of the LLMs belong to the running event loop, they must be closed before it is
+        for model in self.llms_wapper_map.values():
+            await model.close_async()
+
+    async def extract_page_range_async(self, index, page_range, execution_id):
+        # Mongo writes block, they run in a thread so the LLM calls of the other page ranges and groups go on
+        pre_extracted_fields, fields_to_extract = await asyncio.to_thread(self.pre_extract_fields, page_range,
+                                                                          execution_id, index)
+        message, message_without_ids = self.build_messages(page_range, fields_to_extract)
+
+        if not verification_triage:
+            gpt_output, verifier_outputs = await asyncio.gather(
+                self.extract_with_gpt_async(index, message, execution_id, pre_extracted_fields, fields_to_extract),
+                self.recursive_validation_async(message_without_ids, execution_id, fields_to_extract, index))
+            return self.validate_gpt_output(gpt_output, verifier_outputs)
+
+        gpt_output = await self.extract_with_gpt_async(index, message, execution_id, pre_extracted_fields,
+                                                       fields_to_extract)
+        fields_to_verify = await asyncio.to_thread(self.select_fields_to_verify, gpt_output, execution_id, index,
+                                                   pre_extracted_fields)
+        verifier_outputs = await self.recursive_validation_async(message_without_ids, execution_id,
+                                                                 fields_to_verify, index)
+
+        return self.validate_gpt_output(gpt_output, verifier_outputs)
+
+    async def extract_with_gpt_async(self, index, message, execution_id, pre_extracted_fields, fields_to_extract):
+        gpt_output = '{}'
+        if fields_to_extract is None or fields_to_extract:
+            gpt_output = await self.send_and_store_async(
+                'gpt', self.build_extraction_prompt(fields_to_extract), message, execution_id,
+                self.get_output_key('extracted_data_gpt4', index))
+        return self.merge_pre_extracted_fields(gpt_output, pre_extracted_fields)
+
+    def pre_extract_fields(self, page_range, execution_id, index=0):
+        """
+        Rule-based extraction of the fields with a rigid format in a page range, see RulePreExtractor
 
-    def date_transformer(self, bre_fields_json):
+        Returns:
+            Tuple of (resolved fields in the GPT output format, names of the fields left to the LLM or None for
+            every field)
+        """
+        if not rule_pre_extraction:
+            return {}, None
         try:
-            # Extracting the fields with dates
-            date_fields_list = [x.lower().replace(' ', '_') for x in fields[self.group_name] if 'date' in x]
-            if date_fields_list:
-                date_fields_json = {}
-                for field in date_fields_list:
-                    if bre_fields_json.get(field, None):
-                        date_fields_json[field] = bre_fields_json.get(field)
-                # Transforming dates into american format
-                date_fields_json = self.llms_wapper_map['gpt'].send_message_to_llm(prompt=date_transformer,
-                                                                                   message=f"""Here you have the json: \n{date_fields_json} \n\n Just provide the transformed json as output.""")
-                # Merging the transformed dates into original json
-                if(isinstance(date_fields_json,str)):
-                    date_fields_json = json.loads(date_fields_json)
-                for field in date_fields_list:
-                    if date_fields_json.get(field, None):
-                        bre_fields_json[field] = date_fields_json.get(field)
-        except Exception as e:
-            print('Issue while operating dates: {}'.format(traceback.format_exc()))
-
-    def validate_gpt_output(self, index, gpt_output, message_without_ids, execution_id, raw_text_ocr, to_extract):
-        llm_call_error = True
-        global_bre_fields_json = {}
-        claude_output, llama3_output = self.recursive_validation(message_without_ids, execution_id)
-        id_regex = "\[Id: '([0-9a-z-]*)']"
-        if not llm_call_error:
-            # Cleaning GPT json
-            gpt_output_clean = {}
-            for k, v in gpt_output.items():
-                if isinstance(v, dict):
-                    gpt_output_clean[k] = json.loads(re.sub(id_regex, '', json.dumps(v)))
-                else:
-                    gpt_output_clean[k] = re.sub(id_regex, '', v)
+            pre_extracted_fields = self.rule_extractor.extract(fields_json[self.group_name], page_range)
+        except Exception:
+            print(f"ERROR: Rule pre-extraction failed, every field is extracted by the LLM: {traceback.format_exc()}")
+            return {}, None
+        if not pre_extracted_fields:
+            return {}, None
+
+        output_key = self.get_output_key('extracted_data_rules', index)
+        self.mongo_client.update_one(filter={'execution_id': execution_id},
+                                     data={"$set": {f"{self.group_name}.{output_key}": pre_extracted_fields}})
+        return pre_extracted_fields, [field for field in fields_json[self.group_name]
+                                      if field not in pre_extracted_fields]
+
+    @staticmethod
+    def merge_pre_extracted_fields(gpt_output, pre_extracted_fields):
+        # Output of a page range: GPT fields completed with the ones resolved by the rules, as a JSON string. An
+        # invalid GPT output raises, as it does without pre-extracted fields, so the invocation is retried
+        if not pre_extracted_fields:
+            return gpt_output
+        gpt_fields = json.loads(gpt_output)
+        if not isinstance(gpt_fields, dict):
+            raise ValueError(f"GPT output is not a JSON object: {gpt_output!r}")
+        return json.dumps({**gpt_fields, **pre_extracted_fields})
+
+    @staticmethod
+    def get_output_key(output_key, index):
+        # Outputs of the first page range keep their historical key, the other ranges are suffixed by their index
+        return output_key if index == 0 else f"{output_key}_{index}"
+
+    def send_and_store(self, llm_name, prompt, message, execution_id, output_key):
+        """Calls one of the used LLMs and stores its raw output in the execution record as soon as it arrives"""
+        output = self.llms_wapper_map[llm_name].send_message_to_llm(prompt=prompt, message=message)
+        self.mongo_client.update_one(filter={'execution_id': execution_id},
+                                     data={"$set": {f"{self.group_name}.{output_key}": output}})
+        return output
+
+    async def send_and_store_async(self, llm_name, prompt, message, execution_id, output_key):
+        output = await self.llms_wapper_map[llm_name].send_message_async(prompt=prompt, message=message)
+        await asyncio.to_thread(self.mongo_client.update_one, filter={'execution_id': execution_id},
+                                data={"$set": {f"{self.group_name}.{output_key}": output}})
+        return output
+
+    def select_fields_to_verify(self, gpt_output, execution_id, index=0, pre_extracted_fields=None):
+        """
+        Triage of the GPT output: fields with low Textract confidence, no Id citations or failing the regex rules
+        of the app are uncertain, the others are not sent to the verifiers. Fields resolved by the rules are
+        never verified
 
-            fields_ok, fields_nok = self.validate_extracted_data(gpt_output_clean, claude_output, llama3_output)
+        Returns:
+            Names of the fields to verify, None to verify every field
+        """
+        fields_to_verify = select_uncertain_fields(gpt_output, self.group_name, id_regex_pattern,
+                                                   self.ids_to_confidence_mapping, self.rule_index,
+                                                   verification_confidence_threshold)
+        if pre_extracted_fields:
+            if fields_to_verify is None:
+                fields_to_verify = list(fields_json[self.group_name])
+            fields_to_verify = [field for field in fields_to_verify if field not in pre_extracted_fields]
+        self.mongo_client.update_one(filter={'execution_id': execution_id},
+                                     data={"$set": {
+                                         f"{self.group_name}.{self.get_output_key('fields_to_verify', index)}":
+                                             fields_to_verify}})
+        return fields_to_verify
+
+    def build_verification_prompt(self, fields_to_verify):
+        # Prompt of the verifiers, narrowed to the fields to verify
+        fields_to_extract = fields_json_v2[self.group_name]
+        if fields_to_verify is not None:
+            fields_to_extract = {field: value for field, value in fields_to_extract.items() if field in fields_to_verify}
+        return extraction_prompt.replace("{json}", json.dumps(fields_to_extract))
+
+    def recursive_validation(self, message_without_ids, execution_id, fields_to_verify=None, index=0):
+        if fields_to_verify is not None and not fields_to_verify:
+            return None, None
+        prompt = self.build_verification_prompt(fields_to_verify)
+        # Both verifier models are called concurrently, a failed call leaves its output empty
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            verifier_futures = [
+                executor.submit(self.send_and_store, 'aux1', prompt, message_without_ids, execution_id,
+                                self.get_output_key('extracted_data_claude3', index)),
+                executor.submit(self.send_and_store, 'aux2', prompt, message_without_ids, execution_id,
+                                self.get_output_key('extracted_data_llama3', index)),
+            ]
+
+        verifier_outputs = []
+        for future in verifier_futures:
+            try:
+                verifier_outputs.append(future.result())
+            except Exception as e:
+                print(f"ERROR: Verifier LLM call failed: {traceback.format_exc()}")
+                verifier_outputs.append(None)
+        claude_output, llama3_output = verifier_outputs
+        return claude_output, llama3_output
 
-            self.mongo_client.update_one(filter={'execution_id': execution_id}, data={
-                "$set": {f"{self.group_name}.fields_ok": fields_ok, f"{self.group_name}.fields_nok": fields_nok}})
+    async def recursive_validation_async(self, message_without_ids, execution_id, fields_to_verify=None, index=0):
+        if fields_to_verify is not None and not fields_to_verify:
+            return None, None
+        prompt = self.build_verification_prompt(fields_to_verify)
+        verifier_outputs = await asyncio.gather(
+            self.send_and_store_async('aux1', prompt, message_without_ids, execution_id,
+                                      self.get_output_key('extracted_data_claude3', index)),
+            self.send_and_store_async('aux2', prompt, message_without_ids, execution_id,
+                                      self.get_output_key('extracted_data_llama3', index)),
+            return_exceptions=True)
+
+        for verifier_output in verifier_outputs:
+            if isinstance(verifier_output, Exception):
+                print(f"ERROR: Verifier LLM call failed: {verifier_output!r}")
+        claude_output, llama3_output = [None if isinstance(output, Exception) else output for output in verifier_outputs]
+        return claude_output, llama3_output
 
-            if fields_nok:
-                gpt_output2 = self.llms_wapper_map['gpt'].send_message_to_llm(
-                    prompt=extraction_prompt.replace("{json}", json.dumps(fields_json[self.group_name])),
-                    message=f"""Extract the following: \n{to_extract} \n\n from the following text: \n{raw_text_ocr}\n\n\n\nUse these values extracted by other LLM as reference:\n{claude_output}""")
+    def get_date_fields(self, bre_fields_json):
+        # Extracting the fields with dates
+        date_fields_list = [x.lower().replace(' ', '_') for x in fields[self.group_name] if 'date' in x]
+        date_fields_json = {}
+        for field in date_fields_list:
+            if bre_fields_json.get(field, None):
+                date_fields_json[field] = bre_fields_json.get(field)
+        return date_fields_list, date_fields_json
+
+    def normalize_dates(self, bre_fields_json):
+        # Transforming dates into american format locally, the values that cannot be parsed are kept for the LLM
+        date_fields_list, date_fields_json = self.get_date_fields(bre_fields_json)
+        for field, field_json in date_fields_json.items():
+            value = field_json.get('value')
+            if not isinstance(value, str):
+                continue
+            normalized_date = normalize_date(value)
+            if normalized_date is None:
+                self.unparsed_dates[field] = value
+            else:
+                field_json['value'] = normalized_date
 
-                for field in fields_nok:
-                    gpt_output[field] = gpt_output2[field]
+    def transform_dates(self, unparsed_dates):
+        """
+        Transforms with a single LLM call the dates that could not be parsed locally
 
-            self.mongo_client.update_one(filter={'execution_id': execution_id},
-                                         data={"$set": {f"{self.group_name}.extracted_data_gpt4_final": gpt_output}})
+        Args:
+            unparsed_dates: Dictionary of group name to the unparsed_dates of its engine, for the whole document
 
-        bre_fields_json = self.extract_field_values_and_coordinates(gpt_output, id_regex,
-                                                                    self.llms_wapper_map["gpt_mini"])
+        Returns:
+            Same dictionary with the transformed dates, empty if the call failed
+        """
+        try:
+            transformed_dates = self.llms_wapper_map['gpt'].send_message_to_llm(prompt=date_transformer,
+                                                                               message=f"""Here you have the json: \n{json.dumps(unparsed_dates)} \n\n Just provide the transformed json as output.""")
+            if isinstance(transformed_dates, str):
+                transformed_dates = json.loads(transformed_dates)
+            return transformed_dates
+        except Exception as e:
+            print('Issue while operating dates: {}'.format(traceback.format_exc()))
+            return {}
+
+    def merge_transformed_dates(self, bre_fields_json, extracted_data_clean, transformed_dates):
+        # Merging the dates transformed by the LLM into the extraction result of the group
+        for field, value in transformed_dates.items():
+            if field in self.unparsed_dates and isinstance(value, str) and bre_fields_json.get(field, None):
+                bre_fields_json[field]['value'] = value
+                extracted_data_clean[field] = value
+
+    def validate_gpt_output(self, gpt_output, verifier_outputs):
+        # The verifier outputs are only stored in the execution record, the GPT re-extraction of the fields they
+        # dispute (see validate_extracted_data) is disabled
+        id_regex = id_regex_pattern
+        bre_fields_json = self.extract_field_values_and_coordinates(gpt_output, id_regex)
+        return bre_fields_json, self.get_field_confidences(gpt_output, id_regex)
+
+    def get_field_confidences(self, gpt_output, id_regex):
+        # Triage score of every extracted field, used to merge the results of several page ranges
+        try:
+            return {field.lower().replace(' ', '_'): score_field(value, id_regex, self.ids_to_confidence_mapping)
+                    for field, value in json.loads(gpt_output).items()}
+        except Exception:
+            return {}
+
+    def build_extraction_result(self, chunk_results, id_regex):
+        global_bre_fields_json = {}  # Fields extracted from every page range, by page range index
+        for index, (chunk_fields_json, _) in enumerate(chunk_results):
+            global_bre_fields_json[index] = chunk_fields_json
+        print(global_bre_fields_json,"global_bre_fields_json")
+        bre_fields_json = merge_chunk_fields(chunk_results, extraction_merge_policy)
 
         # Dates operations (optional)
-        self.date_transformer(bre_fields_json)
-        global_bre_fields_json[index] = bre_fields_json
-        print(global_bre_fields_json,"global_bre_fields_json")
-        bre_fields_json = global_bre_fields_json[0]
+        self.normalize_dates(bre_fields_json)
 
         extracted_data_clean = defaultdict(dict)
         for field, value in bre_fields_json.items():
@@ -227,14 +516,13 @@ class FullPageOCRExtractionEngine(OCRExtractionEngine):
                 fields_nok.append(k)
         return fields_ok, fields_nok
 
-    def extract_field_values_and_coordinates(self, gpt_output, id_regex, llm_wrapper_gpt):
+    def extract_field_values_and_coordinates(self, gpt_output, id_regex):
         bre_fields_json = {}
         gpt_output = json.loads(gpt_output)
         print(gpt_output,type(gpt_output),"gpt_output===")
         for field, value in gpt_output.items():
             try:
                 original_field = field
-                coords = None
                 field = field.lower().replace(' ', '_')
                 # Regular field (plain text)
                 if fields_type[self.group_name][original_field].get('type', None) == 'regular' and isinstance(
@@ -244,50 +532,37 @@ class FullPageOCRExtractionEngine(OCRExtractionEngine):
 
                     id_founds = re.findall(id_regex, value)
 
+                    page_boxes = []
+
                     if len(id_founds) == 0:
-                        pass
+                        coordinates = {}
 
                     elif len(id_founds) == 1:
                         coords = self.ids_to_coord_mapping[id_founds[0]]
                         print(coords,"coords")
-                    #  If multi-word value, we ask GPT to generate the surrounding box containing all the words
+                        coordinates = {
+                            "x": coords['Polygon'][0]['X'],
+                            "y": coords['Polygon'][0]['Y'],
+                            "width": coords['BoundingBox']['Width'],
+                            "height": coords['BoundingBox']['Height'],
+                            "page": self.ids_to_page_mapping[id_founds[0]] + 1
+                        }
+                    #  If multi-word value, the surrounding box is the union of the word boxes (one box per page)
                     else:
-                        c = 1
-                        coords = ''
-                        for id in id_founds:
-                            coords += """
-                                Word{}:
-                                x={}
-                                y={}
-                                width={}
-                                height={}
-
-                            """.format(c, self.ids_to_coord_mapping[id]['Polygon'][0]['X'],
-                                       self.ids_to_coord_mapping[id]['Polygon'][0]['Y'],
-                                       self.ids_to_coord_mapping[id]['BoundingBox']['Width'],
-                                       self.ids_to_coord_mapping[id]['BoundingBox']['Height'])
-                            c += 1
-                        coord_gpt_output = llm_wrapper_gpt.send_message_to_llm(prompt='You are a helpful AI assistant',
-                                                                    message=coord_prompt.replace("{coords}", coords))
-                        print(coord_gpt_output,"coord_gpt_output")
-                        if isinstance(coord_gpt_output,str):
-                            coord_gpt_output = json.loads(coord_gpt_output)
+                        page_boxes = merge_word_boxes(id_founds, self.ids_to_coord_mapping, self.ids_to_page_mapping)
+                        coordinates = page_boxes[0]
+
                     # Building JSON using Case Manager expected format
                     bre_fields_json[field] = {
                         "value": re.sub(id_regex, '', value).rstrip(),
-                        "coordinates": {
-                            "x": coords['Polygon'][0]['X'] if len(id_founds) == 1 else coord_gpt_output['x'],
-                            "y": coords['Polygon'][0]['Y'] if len(id_founds) == 1 else coord_gpt_output['y'],
-                            "width": coords['BoundingBox']['Width'] if len(id_founds) == 1 else coord_gpt_output[
-                                'width'],
-                            "height": coords['BoundingBox']['Height'] if len(id_founds) == 1 else coord_gpt_output[
-                                'height'],
-                            "page": self.ids_to_page_mapping[id_founds[0]] + 1
-                        } if len(id_founds) > 0 else {},
+                        "coordinates": coordinates,
                         "pass": True,
                         "display": True,
                         "message": ""
                     }
+                    # Values spanning several pages also get the box of every page
+                    if len(page_boxes) > 1:
+                        bre_fields_json[field]["coordinates_per_page"] = page_boxes
                 else:
                     print('Unexpected field type extracted by LLM ({} vs {})'.format(type(gpt_output[original_field]),
                                                                                      fields_type[self.group_name][
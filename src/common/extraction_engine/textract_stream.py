@@ -0,0 +1,101 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+WHITESPACE_REGEX = re.compile(r'[ \t\n\r]*')
+json_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Text buffer over the chunks of a JSON document, decoding one value at a time"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _read_more(self) -> bool:
+        """Append the next chunk to the buffer, dropping the consumed text; False once the document is read"""
+        if self.exhausted:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            text = self.utf8_decoder.decode(b'', final=True)
+        else:
+            text = self.utf8_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at the end of the document"""
+        while True:
+            self.position = WHITESPACE_REGEX.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read_more():
+                return ''
+
+    def expect(self, character: str):
+        """Consume the next non-whitespace character, which must be the given one"""
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Invalid Textract JSON: expected {character!r} but found {found!r}")
+        self.position += 1
+
+    def decode_value(self) -> Any:
+        """Decode the next JSON value, reading chunks until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = json_decoder.raw_decode(self.buffer, self.position)
+                # A number or literal at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._read_more()
+
+
+def iter_textract_blocks(chunks: Iterable[bytes], metadata: Dict[str, Any]) -> Iterator[Dict]:
+    """
+    Incrementally parse a Textract output document, never holding more than one block and one chunk of text
+
+    Args:
+        chunks: Bytes of the document, for instance the iter_content of a streamed HTTP response
+        metadata: Receives the other top-level keys of the document ('DocumentMetadata', ...)
+
+    Returns:
+        Iterator over the elements of 'Blocks', in document order
+    """
+    stream = _JsonStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+
+    while True:
+        key = stream.decode_value()
+        stream.expect(':')
+        if key == 'Blocks' and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield stream.decode_value()
+                    if stream.peek() == ']':
+                        stream.expect(']')
+                        break
+                    stream.expect(',')
+        else:
+            metadata[key] = stream.decode_value()
+
+        if stream.peek() == '}':
+            return
+        stream.expect(',')
@@ -0,0 +1,74 @@
+import json
+import re
+from typing import Dict, List, Optional
+from ..validation_helper.core.enums import ValidationType
+from ..validation_helper.core.rule_index import RuleIndex
+from ..validation_helper.validators.regex_validator import RegexValidator
+from .fields_to_extract import fields_json
+
+regex_validator = RegexValidator()
+
+
+def score_field(value, id_regex: str, ids_to_confidence_mapping: Dict[str, float],
+                regex_rules: List[Dict] = ()) -> float:
+    """
+    Scores how much an extracted value can be trusted without asking the verifier LLMs, from 0 to 100.
+
+    The score is the lowest Textract confidence of the words cited by the value. Values without citations
+    (not found, not grounded in the OCR text, or tables) and values failing a regex rule of the field score 0.
+    """
+    if not isinstance(value, str) or value.lower() == 'none':
+        return 0.0
+
+    cited_ids = re.findall(id_regex, value)
+    confidences = [ids_to_confidence_mapping.get(word_id) for word_id in cited_ids]
+    if not confidences or None in confidences:
+        return 0.0
+
+    clean_value = re.sub(id_regex, '', value).rstrip()
+    for rule in regex_rules:
+        try:
+            is_valid, _ = regex_validator.validate(clean_value, rule)
+        except Exception:
+            continue
+        if not is_valid:
+            return 0.0
+
+    return float(min(confidences))
+
+
+def select_uncertain_fields(gpt_output, group_name: str, id_regex: str, ids_to_confidence_mapping: Dict[str, float],
+                            rule_index: Optional[RuleIndex] = None, threshold: float = 90.0) -> Optional[List[str]]:
+    """
+    Selects the fields of a GPT extraction that must be verified by the other LLMs
+
+    Args:
+        gpt_output: GPT extraction (JSON string or dictionary of field name to value)
+        group_name: OCR group the extraction belongs to
+        id_regex: Regex of the word id citations
+        ids_to_confidence_mapping: Textract confidence of every word id
+        rule_index: Validation rules of the app, their REGEX_LIST field rules take part in the score
+        threshold: Fields scoring below this are uncertain
+
+    Returns:
+        Names of the uncertain fields, or None if the output cannot be scored and every field must be verified
+    """
+    try:
+        if isinstance(gpt_output, str):
+            gpt_output = json.loads(gpt_output)
+    except Exception:
+        return None
+    if not isinstance(gpt_output, dict):
+        return None
+
+    # Every field of the group is scored, a field GPT left out scores 0 and is re-extracted by the verifiers
+    uncertain_fields = []
+    for field in fields_json[group_name]:
+        value = gpt_output.get(field)
+        regex_rules = []
+        if rule_index is not None:
+            regex_rules = [rule for rule in rule_index.get_field_rules(group_name, field.lower().replace(' ', '_'))
+                           if rule.get('validation_type') == ValidationType.REGEX_LIST.value]
+        if score_field(value, id_regex, ids_to_confidence_mapping, regex_rules) < threshold:
+            uncertain_fields.append(field)
+    return uncertain_fields
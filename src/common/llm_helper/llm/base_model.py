@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class BaseModel(ABC):
@@ -7,4 +8,17 @@ class BaseModel(ABC):
 
     @abstractmethod
     def send_message_to_llm(self, message: str, prompt: str):
-        raise NotImplemented("This method must be implemented in subclass")
\ No newline at end of file
+        raise NotImplemented("This method must be implemented in subclass")
+
+    async def send_message_async(self, message: str, prompt: str):
+        """Async version of send_message_to_llm, models without a native async client run it in a thread"""
+        return await asyncio.to_thread(self.send_message_to_llm, message=message, prompt=prompt)
+
+    async def close_async(self):
+        """Closes the async client of the model, if any, before its event loop is closed"""
+        return None
+
+    @abstractmethod
+    def get_cache_identity(self) -> dict:
+        """Model id and inference parameters, identifying the responses of this model in the response cache"""
+        raise NotImplemented("This method must be implemented in subclass")
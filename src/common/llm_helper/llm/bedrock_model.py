@@ -1,9 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from typing_extensions import override
 import boto3
+from botocore.config import Config
 from .base_model import BaseModel
 from dataclasses import dataclass
 
+# boto3 has no async client: async calls run on this shared pool, sized for dozens of in-flight requests
+MAX_CONCURRENT_REQUESTS = 32
+async_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix='bedrock')
+
 @dataclass
 class BedrockModel(BaseModel):
     _llm_params: dict[str, Any]
@@ -15,10 +22,12 @@ class BedrockModel(BaseModel):
         self._model = self._llm_params['model']
         self._engine = self._llm_params['engine']
         self._deployment = self._llm_params['deployment']
+        self._inference_config = {"maxTokens": 2000, "temperature": 0.7, "topP": 1}
 
     @override
     def initialize_client(self):
-        self._client = boto3.client("bedrock-runtime", region_name=self._llm_params['region_name'])
+        self._client = boto3.client("bedrock-runtime", region_name=self._llm_params['region_name'],
+                                    config=Config(max_pool_connections=MAX_CONCURRENT_REQUESTS))
 
     @override
     def send_message_to_llm(self, message: str, prompt: str):
@@ -30,6 +39,15 @@ class BedrockModel(BaseModel):
             system=[
                 {'text': prompt},
             ],
-            inferenceConfig={"maxTokens": 2000, "temperature": 0.7, "topP": 1},
+            inferenceConfig=self._inference_config,
         )
-        return response["output"]["message"]["content"][0]["text"]
\ No newline at end of file
+        return response["output"]["message"]["content"][0]["text"]
+
+    @override
+    async def send_message_async(self, message: str, prompt: str):
+        return await asyncio.get_running_loop().run_in_executor(
+            async_executor, lambda: self.send_message_to_llm(message=message, prompt=prompt))
+
+    @override
+    def get_cache_identity(self) -> dict:
+        return {"provider": "bedrock", "model": self._model, "inference_config": self._inference_config}
\ No newline at end of file
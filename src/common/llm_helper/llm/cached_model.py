@@ -0,0 +1,62 @@
+import asyncio
+import json
+from typing_extensions import override
+from .base_model import BaseModel
+from ..llm_response_cache import LLMResponseCache
+from dataclasses import dataclass
+
+
+@dataclass
+class CachedModel(BaseModel):
+    """Wraps a model, answering repeated requests from the LLM response cache"""
+    _model: BaseModel
+    _cache: LLMResponseCache
+    _bypass_cache: bool = False  # Reprocessing: the model is always called, its response replaces the cached one
+
+    @override
+    def initialize_client(self):
+        self._model.initialize_client()
+
+    @override
+    def send_message_to_llm(self, message: str, prompt: str):
+        model_identity = self._model.get_cache_identity()
+        key = self._cache.build_key(model_identity, prompt, message)
+        response = None if self._bypass_cache else self._cache.get(key)
+        if response is None:
+            response = self._model.send_message_to_llm(message=message, prompt=prompt)
+            self.store_response(key, response, model_identity)
+        return response
+
+    @override
+    async def send_message_async(self, message: str, prompt: str):
+        # The /tmp and Mongo tiers block, they are read and written in a thread to keep the event loop free
+        model_identity = self._model.get_cache_identity()
+        key = self._cache.build_key(model_identity, prompt, message)
+        response = None if self._bypass_cache else await asyncio.to_thread(self._cache.get, key)
+        if response is None:
+            response = await self._model.send_message_async(message=message, prompt=prompt)
+            await asyncio.to_thread(self.store_response, key, response, model_identity)
+        return response
+
+    @override
+    async def close_async(self):
+        await self._model.close_async()
+
+    def store_response(self, key: str, response, model_identity: dict):
+        """
+        Caches a response only if it parses as the JSON object the prompts ask for: a truncated or malformed
+        answer makes the caller fail, and a retry must call the model again instead of getting it back
+        """
+        try:
+            is_valid = isinstance(json.loads(response), dict)
+        except Exception:
+            is_valid = False
+        if is_valid:
+            self._cache.set(key, response, model_identity)
+        else:
+            print(f"WARNING: LLM response is not a JSON object, it is not cached: {response!r}")
+            self._cache.delete(key)
+
+    @override
+    def get_cache_identity(self) -> dict:
+        return self._model.get_cache_identity()
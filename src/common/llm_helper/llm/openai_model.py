@@ -1,6 +1,7 @@
+import asyncio
 from typing import Any
 from typing_extensions import override
-from openai import AzureOpenAI, OpenAI
+from openai import AsyncAzureOpenAI, AsyncOpenAI, AzureOpenAI, OpenAI
 from .base_model import BaseModel
 from dataclasses import dataclass
 
@@ -8,6 +9,7 @@ from dataclasses import dataclass
 class OpenAIModel(BaseModel):
     _llm_params: dict[str, Any]
     _client = None
+    _async_client = None
 
     def __post_init__(self):
         if not self._llm_params:
@@ -15,31 +17,82 @@ class OpenAIModel(BaseModel):
         self._model = self._llm_params['model']
         self._engine = self._llm_params['engine']
         self._deployment = self._llm_params['deployment']
+        self._response_format = {"type": "json_object"}
+        self._async_client_loop = None
 
     @override
     def initialize_client(self):
+        self._client = self._build_client(AzureOpenAI, OpenAI)
+
+    def _build_client(self, azure_client_class, public_client_class):
         if self._llm_params['deployment'] == 'azure':
-            self._client = AzureOpenAI(
+            return azure_client_class(
                 azure_endpoint=self._llm_params['endpoint'],
                 api_key=self._llm_params['api_key'],
                 api_version=self._llm_params['api_version']
             )
         elif self._llm_params['deployment'] == 'public':
-            self._client = OpenAI(api_key=self._llm_params['api_key'])
+            return public_client_class(api_key=self._llm_params['api_key'])
         else:
             raise ValueError('Deployment not supported')
 
+    async def _get_async_client(self):
+        # The async HTTP pool belongs to an event loop, a new one is built for every loop (e.g. each asyncio.run).
+        # The new client is set before awaiting anything, so concurrent calls never build two of them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            previous_client = self._async_client
+            self._async_client = self._build_client(AsyncAzureOpenAI, AsyncOpenAI)
+            self._async_client_loop = loop
+            if previous_client is not None:
+                await self._close_client(previous_client)
+        return self._async_client
+
+    @staticmethod
+    async def _close_client(client):
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"WARNING: Could not close the async OpenAI client: {e}")
+
+    @override
+    async def close_async(self):
+        client, self._async_client, self._async_client_loop = self._async_client, None, None
+        if client is not None:
+            await self._close_client(client)
+
+    def _build_messages(self, message: str, prompt: str):
+        return [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": message}
+        ]
+
     @override
     def send_message_to_llm(self, message: str, prompt: str):
         response = self._client.chat.completions.create(
             model=self._model,
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": message}
-            ],
-            response_format={"type": "json_object"},
+            messages=self._build_messages(message, prompt),
+            response_format=self._response_format,
+            timeout=120
+        )
+        print("prompt", {"role": "system", "content": prompt},
+                {"role": "user", "content": message})
+        return response.choices[0].message.content
+
+    @override
+    async def send_message_async(self, message: str, prompt: str):
+        client = await self._get_async_client()
+        response = await client.chat.completions.create(
+            model=self._model,
+            messages=self._build_messages(message, prompt),
+            response_format=self._response_format,
             timeout=120
         )
         print("prompt", {"role": "system", "content": prompt},
                 {"role": "user", "content": message})
         return response.choices[0].message.content
+
+    @override
+    def get_cache_identity(self) -> dict:
+        return {"provider": "openai", "model": self._model, "deployment": self._deployment,
+                "response_format": self._response_format}
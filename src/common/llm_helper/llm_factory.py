@@ -1,3 +1,5 @@
+import json
+import threading
 from typing import Any
 from .llm.base_model import BaseModel
 from .llm.bedrock_model import BedrockModel
@@ -6,6 +8,9 @@ from .llm_models import LLMModel
 
 
 class LLMModelFactory:
+    # Process-wide registry, (provider, model, deployment) -> (llm_params fingerprint, client)
+    _registry: dict[tuple, tuple[str, BaseModel]] = {}
+    _registry_lock = threading.Lock()
 
     def get_llm_model(self, llm_model: LLMModel, llm_params: dict[str, Any]) -> BaseModel:
         if llm_model == LLMModel.OPENAI:
@@ -16,3 +21,17 @@ class LLMModelFactory:
             raise ValueError('Unknown llm_model: {}'.format(llm_model))
         model.initialize_client()
         return model
+
+    def get_registered_llm_model(self, llm_model: LLMModel, llm_params: dict[str, Any]) -> BaseModel:
+        """
+        Returns the client of the registry for this (provider, model, deployment), building it on first use.
+        Clients live as long as the container; one is rebuilt only when its llm_params change (secret rotation).
+        """
+        key = (llm_model, llm_params.get('model'), llm_params.get('deployment'))
+        fingerprint = json.dumps(llm_params, sort_keys=True, default=str)
+        with self._registry_lock:
+            registered = self._registry.get(key)
+            if registered is None or registered[0] != fingerprint:
+                registered = (fingerprint, self.get_llm_model(llm_model, llm_params))
+                self._registry[key] = registered
+        return registered[1]
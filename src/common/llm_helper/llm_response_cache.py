@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of LLM responses, keyed by a hash of the model identity and the request.
+
+    Lookups go through three tiers: process memory, files in /tmp (both survive warm invocations)
+    and an optional Mongo collection, shared by all containers, whose documents expire via a TTL index.
+    A retry or a reprocessing of the same work item then only pays for the calls that are not cached yet.
+    """
+    # Memory tier shared by every cache instance of the process, key -> (expires_at, response)
+    _memory: OrderedDict = OrderedDict()
+    _memory_lock = threading.Lock()
+    _indexed_collections = set()
+
+    def __init__(self, collection: Any = None, ttl_seconds: int = 86400, tmp_dir: str = '/tmp/llm_response_cache',
+                 max_memory_entries: int = 512):
+        """
+        Args:
+            collection: pymongo collection of the Mongo tier, None to only cache locally
+            ttl_seconds: Time a response stays cached
+            tmp_dir: Directory of the /tmp tier
+            max_memory_entries: Number of responses kept in memory (least recently used are dropped)
+        """
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.tmp_dir = tmp_dir
+        self.max_memory_entries = max_memory_entries
+
+    @staticmethod
+    def build_key(model_identity: dict, prompt: str, message: str) -> str:
+        """Hash of (model id, inference params, system prompt, user message)"""
+        payload = json.dumps({"model": model_identity, "prompt": prompt, "message": message},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response, or None if no tier has a live entry for the key"""
+        now = time.time()
+        with self._memory_lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[0] > now:
+                    self._memory.move_to_end(key)
+                    return cached[1]
+                del self._memory[key]
+
+        cached = self._read_tmp(key)
+        if cached is None:
+            cached = self._read_mongo(key)
+            if cached is not None:
+                self._write_tmp(key, *cached)
+
+        if cached is None or cached[0] <= now:
+            return None
+        self._write_memory(key, *cached)
+        return cached[1]
+
+    def set(self, key: str, response: Any, model_identity: dict = None):
+        """Stores a response in every tier, failures of the /tmp and Mongo tiers are only logged"""
+        expires_at = time.time() + self.ttl_seconds
+        self._write_memory(key, expires_at, response)
+        self._write_tmp(key, expires_at, response)
+        self._write_mongo(key, expires_at, response, model_identity)
+
+    def delete(self, key: str):
+        """Removes a response from every tier, failures of the /tmp and Mongo tiers are only logged"""
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        self._delete_tmp(key)
+        if self.collection is not None:
+            try:
+                self.collection.delete_one({'_id': key})
+            except Exception as e:
+                print(f"WARNING: Could not delete LLM response cache entry {key}: {e}")
+
+    def _write_memory(self, key: str, expires_at: float, response: Any):
+        with self._memory_lock:
+            self._memory[key] = (expires_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_tmp(self, key: str) -> Optional[tuple]:
+        try:
+            with open(os.path.join(self.tmp_dir, key), encoding='utf-8') as cache_file:
+                cached = json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"WARNING: Unreadable LLM response cache file {key}: {e}")
+            return None
+        # Nothing else evicts the /tmp tier, expired files are removed when they are read
+        if cached['expires_at'] <= time.time():
+            self._delete_tmp(key)
+            return None
+        return cached['expires_at'], cached['response']
+
+    def _delete_tmp(self, key: str):
+        try:
+            os.remove(os.path.join(self.tmp_dir, key))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"WARNING: Could not delete LLM response cache file {key}: {e}")
+
+    def _write_tmp(self, key: str, expires_at: float, response: Any):
+        try:
+            os.makedirs(self.tmp_dir, exist_ok=True)
+            # Written to a temporary name first, so concurrent readers never see a partial file
+            tmp_path = os.path.join(self.tmp_dir, f"{key}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump({'expires_at': expires_at, 'response': response}, cache_file)
+            os.replace(tmp_path, os.path.join(self.tmp_dir, key))
+        except Exception as e:
+            print(f"WARNING: Could not write LLM response cache file {key}: {e}")
+
+    def _read_mongo(self, key: str) -> Optional[tuple]:
+        if self.collection is None:
+            return None
+        try:
+            cached = self.collection.find_one({'_id': key, 'expires_at': {'$gt': datetime.utcnow()}})
+        except Exception as e:
+            print(f"WARNING: Could not read LLM response cache entry {key}: {e}")
+            return None
+        if not cached:
+            return None
+        return time.time() + (cached['expires_at'] - datetime.utcnow()).total_seconds(), cached['response']
+
+    def _write_mongo(self, key: str, expires_at: float, response: Any, model_identity: dict = None):
+        if self.collection is None:
+            return
+        try:
+            self._ensure_ttl_index()
+            self.collection.update_one({'_id': key}, {'$set': {
+                'response': response,
+                'model': model_identity,
+                'expires_at': datetime.utcnow() + timedelta(seconds=expires_at - time.time()),
+            }}, upsert=True)
+        except Exception as e:
+            print(f"WARNING: Could not write LLM response cache entry {key}: {e}")
+
+    def _ensure_ttl_index(self):
+        """Creates the TTL index evicting expired entries, once per collection and process"""
+        collection_name = self.collection.full_name
+        if collection_name not in self._indexed_collections:
+            self.collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed_collections.add(collection_name)
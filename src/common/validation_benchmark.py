@@ -0,0 +1,311 @@
+"""
+Validation throughput benchmark.
+
+Generates synthetic validation_config documents and matching work items, then measures
+ValidatorExecution.validate_data: documents/sec, per-document latency percentiles and memory
+allocated while validating. Results are printed as JSON so runs can be compared between commits.
+
+Usage (from the repository root):
+    python -m src.common.validation_benchmark --rules 200 --documents 500 --output results.json
+"""
+import argparse
+import copy
+import json
+import platform
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+from .benchmark_utils import get_commit
+from .validation_helper.validation_execution import ValidatorExecution
+
+SCENARIOS = ["regex", "expression", "cross_group", "group_level", "mixed"]
+
+REGEX_PATTERNS = [
+    r"^[A-HJ-NPR-Z0-9]{17}$",
+    r"^\$?[\d,]+(\.\d{2})?$",
+    r"^\d{2}/\d{2}/\d{4}$",
+    r"^\d{5}(-\d{4})?$",
+    r"^[A-Z][A-Z '\-]+$",
+    r"^(19|20)\d{2}$",
+    r"(?i)^(new|used)$",
+    r"^[A-Z]{2}$",
+    r"^\d+$",
+    r"^N/A$",
+]
+EXPRESSIONS = [
+    "value is not None",
+    "value >= 1990 and value <= 2030",
+    "abs(safe_subtract(value, 45600)) < 100",
+    "value != 'N/A'",
+    "value > 0",
+]
+FIELD_VALUES = [
+    "2T2BBMCA1RC061029", "1HGCM82633A004352 [Id: '5c1d']", "$45,600.00", "45600", "01/15/2024", "12/31/2099",
+    "90210", "HERMAN DOUGLAS", "used", "TX", "N/A", "", None, 2024, 1989, 45650.5, "abc",
+]
+
+GROUP_COUNT = 4
+
+
+def generate_config(scenario: str, rule_count: int, seed: int = 0) -> Dict:
+    """
+    Generate a synthetic validation_config document
+
+    Args:
+        scenario: One of SCENARIOS, 'mixed' cycles through the other rule kinds
+        rule_count: Number of validation rules
+        seed: Random seed
+
+    Returns:
+        Configuration document in the validation_config format
+    """
+    rnd = random.Random(seed)
+    kinds = SCENARIOS[:-1] if scenario == "mixed" else [scenario]
+    rules = []
+
+    for i in range(rule_count):
+        kind = kinds[i % len(kinds)]
+        group_name = f"group_{i % GROUP_COUNT}"
+        other_group = f"group_{(i + 1) % GROUP_COUNT}"
+        rule_id = f"{group_name}.field_{i}.{kind}"
+
+        if kind == "regex":
+            # Every fourth rule is a long OR list, matched with a combined alternation
+            long_list = i % 4 == 0
+            rules.append({
+                "id": rule_id,
+                "groups": [group_name],
+                "validation_type": "REGEX_LIST",
+                "regexes": REGEX_PATTERNS if long_list else rnd.sample(REGEX_PATTERNS, rnd.randint(1, 3)),
+                "error_msgs": [f"Invalid format for field_{i}"],
+                "conditionType": "OR" if long_list or rnd.random() < 0.5 else "AND",
+            })
+        elif kind == "expression":
+            rules.append({
+                "id": rule_id,
+                "groups": [group_name],
+                "validation_type": "EXPRESSION_TYPE_LIST",
+                "expressions": rnd.sample(EXPRESSIONS, rnd.randint(1, 2)),
+                "error_msgs": [f"Invalid value for field_{i}"],
+            })
+        elif kind == "cross_group":
+            rules.append({
+                "id": rule_id,
+                "groups": [group_name, other_group],
+                "validation_type": "EXPRESSION_TYPE_LIST",
+                "expressions": [f"abs(safe_subtract(value, {other_group}.field_{rnd.randrange(rule_count)}.value)) < 1"],
+                "error_msgs": [f"field_{i} does not match {other_group}"],
+            })
+        else:
+            rules.append({
+                "id": f"group_rule_{i}",
+                "groups": [],
+                "validation_type": "EXPRESSION_TYPE_LIST",
+                "expressions": [f"{group_name}.field_{rnd.randrange(rule_count)}.value == "
+                                f"{other_group}.field_{rnd.randrange(rule_count)}.value"],
+                "error_msgs": [f"Group rule {i} failed"],
+            })
+
+    # Split the rules over several property groups, as in stored configurations
+    return {
+        "app_id": f"benchmark_{scenario}",
+        "properties": [{"validation_rules": rules[start:start + 50]} for start in range(0, len(rules), 50)],
+    }
+
+
+def generate_documents(rule_count: int, document_count: int, seed: int = 0) -> List[Dict]:
+    """
+    Generate synthetic work items with a field for every generated rule id
+
+    Args:
+        rule_count: Number of rules of the matching configuration
+        document_count: Number of documents
+        seed: Random seed
+
+    Returns:
+        List of documents in the worksheet format validated by validate_data
+    """
+    rnd = random.Random(seed)
+    documents = []
+    for _ in range(document_count):
+        groups = {f"group_{g}": {"fields": {}} for g in range(GROUP_COUNT)}
+        for i in range(rule_count):
+            # Fields are created in every group, so cross-group references always resolve
+            for group_data in groups.values():
+                group_data["fields"][f"field_{i}"] = {"value": rnd.choice(FIELD_VALUES), "pass": True, "message": ""}
+        documents.append({"groups": groups})
+    return documents
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(scenario: str, rule_count: int, document_count: int, seed: int = 0, warmup: int = 10) -> Dict[str, Any]:
+    """
+    Benchmark validate_data for one scenario
+
+    Args:
+        scenario: One of SCENARIOS
+        rule_count: Number of validation rules
+        document_count: Number of timed documents
+        seed: Random seed
+        warmup: Number of documents validated before timing
+
+    Returns:
+        Dictionary with throughput, latency and allocation metrics
+    """
+    config = generate_config(scenario, rule_count, seed)
+    documents = generate_documents(rule_count, document_count, seed)
+    execution = ValidatorExecution()
+
+    start = time.perf_counter()
+    execution.compile_config(config)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    for document in documents[:warmup]:
+        execution.validate_data(copy.deepcopy(document), config)
+
+    # validate_data writes its results into the document, every run gets a fresh copy
+    work_items = [copy.deepcopy(document) for document in documents]
+    latencies = []
+    failed = 0
+    total_start = time.perf_counter()
+    for document in work_items:
+        start = time.perf_counter()
+        is_valid, _ = execution.validate_data(document, config)
+        latencies.append(time.perf_counter() - start)
+        failed += not is_valid
+    total_seconds = time.perf_counter() - total_start
+
+    retained, peak = _measure_allocations(execution, config, documents)
+    latencies.sort()
+
+    return {
+        "scenario": scenario,
+        "rules": rule_count,
+        "documents": document_count,
+        "invalid_documents": failed,
+        "compile_ms": round(compile_ms, 3),
+        "docs_per_sec": round(document_count / total_seconds, 2) if total_seconds else None,
+        "latency_ms": {
+            "mean": round(total_seconds / document_count * 1000, 4) if document_count else 0.0,
+            "p50": round(_percentile(latencies, 50) * 1000, 4),
+            "p99": round(_percentile(latencies, 99) * 1000, 4),
+            "max": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        },
+        "allocations": {
+            "retained_bytes_per_doc": round(retained / document_count) if document_count else 0,
+            "max_peak_bytes_per_doc": peak,
+        },
+    }
+
+
+def _measure_allocations(execution: ValidatorExecution, config: Dict, documents: List[Dict]) -> Tuple[int, int]:
+    """
+    Measure the memory allocated by validate_data, in a separate pass since tracing slows validation down
+
+    Returns:
+        Tuple of (bytes still allocated after validating all documents, highest peak of a single document)
+    """
+    work_items = [copy.deepcopy(document) for document in documents]
+    retained = 0
+    peak = 0
+
+    tracemalloc.start()
+    try:
+        for document in work_items:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            execution.validate_data(document, config)
+            current, document_peak = tracemalloc.get_traced_memory()
+            retained += max(0, current - before)
+            peak = max(peak, document_peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return retained, peak
+
+
+def check_revalidate(scenario: str, rule_count: int, document_count: int, seed: int = 0) -> List[str]:
+    """
+    Check that revalidate gives the same result as a full validate_data after changing one field
+
+    Each document is validated, one field read by another rule is changed, then the document is
+    revalidated and compared with a full validation of the changed document.
+
+    Returns:
+        List of mismatch descriptions, empty if revalidate and validate_data always agree
+    """
+    rnd = random.Random(seed)
+    config = generate_config(scenario, rule_count, seed)
+    documents = generate_documents(rule_count, document_count, seed)
+    execution = ValidatorExecution()
+    rule_index = execution.compile_config(config)
+    # Fields read by a rule, including the cross-field references of field and group-level rules
+    changeable = set(rule_index.field_dependents)
+    for reads in rule_index.group_rule_reads:
+        changeable.update(reads or ())
+    changeable = sorted(changeable)
+    mismatches = []
+
+    for number, document in enumerate(documents):
+        _, previous_result = execution.validate_data(copy.deepcopy(document), rule_index)
+
+        group_name, field_name = rnd.choice(changeable)
+        changed = copy.deepcopy(document)
+        changed["groups"][group_name]["fields"][field_name]["value"] = rnd.choice(FIELD_VALUES)
+
+        expected_valid, expected = execution.validate_data(copy.deepcopy(changed), rule_index)
+        actual_valid, actual = execution.revalidate(changed, [f"{group_name}.{field_name}"], previous_result,
+                                                    rule_index)
+        if actual_valid != expected_valid or actual != expected:
+            mismatches.append(f"document {number}: revalidate after changing {group_name}.{field_name} "
+                              f"differs from validate_data")
+    return mismatches
+
+
+def run_benchmark(scenarios: List[str], rule_count: int, document_count: int, seed: int = 0,
+                  warmup: int = 10) -> Dict[str, Any]:
+    """Run the benchmark for several scenarios and collect the results"""
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "results": [run_scenario(scenario, rule_count, document_count, seed, warmup) for scenario in scenarios],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ValidatorExecution.validate_data")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--rules", type=int, default=100, help="Number of rules per configuration")
+    parser.add_argument("--documents", type=int, default=200, help="Number of timed documents per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--check-revalidate", action="store_true",
+                        help="Only check that revalidate matches validate_data, exit with 1 on a mismatch")
+    args = parser.parse_args()
+
+    if args.check_revalidate:
+        mismatches = [mismatch for scenario in args.scenarios
+                      for mismatch in check_revalidate(scenario, args.rules, args.documents, args.seed)]
+        print("\n".join(mismatches) or "revalidate matches validate_data")
+        raise SystemExit(1 if mismatches else 0)
+
+    results = run_benchmark(args.scenarios, args.rules, args.documents, args.seed, args.warmup)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
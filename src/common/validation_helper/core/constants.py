@@ -8,6 +8,10 @@ class ValidationConstants:
     # Field reference patterns
     FIELD_REFERENCE_PATTERN = r'\b([a-zA-Z_][a-zA-Z0-9_-]*\.[a-zA-Z_][a-zA-Z0-9_-]*(?:\.[a-zA-Z_][a-zA-Z0-9_-]*)*)\b'
     VALUE_REFERENCE_PATTERN = r'\bvalue\b'
+    STRING_LITERAL_PATTERN = r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''
+
+    # OR regex lists with at least this many patterns are matched with a single combined alternation
+    REGEX_ALTERNATION_MIN_PATTERNS = 8
 
     # Mathematical operation patterns
     ABS_SUBTRACT_PATTERN = r'abs\(([^)]+)\s*-\s*([^)]+)\)'
@@ -27,6 +31,8 @@ class ValidationConstants:
         "NULL", "null", "NONE", "none",
         "-", "", "undefined", "UNDEFINED"
     }
+    # Date format of extracted date values (see date_is_future)
+    DATE_FORMAT = "%m/%d/%Y"
 
     # Error message templates
     ERROR_MESSAGES = {
@@ -1,5 +1,11 @@
-from typing import Dict, Tuple, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Tuple, List, Union
 from ..validation_helper.core.validation_engine import ValidationEngine
+from ..validation_helper.core.field_value_table import FieldValueTable
+from ..validation_helper.core.rule_index import RuleIndex
+from ..validation_helper.core.vectorized_evaluator import VectorizedEvaluator
 
 
 class ValidatorExecution:
@@ -7,13 +13,43 @@ class ValidatorExecution:
 
     def __init__(self):
         self.validation_engine = ValidationEngine()
+        self.vectorized_evaluator = VectorizedEvaluator(self.validation_engine.expression_validator)
+        self._compiled_config = None
+        self._compiled_rule_index = None
+
+    def compile_config(self, config: Dict) -> RuleIndex:
+        """
+        Build the rule index for a configuration, reusing it while the same config is validated
+
+        Args:
+            config: Validation configuration document (as stored in validation_config)
+
+        Returns:
+            RuleIndex with the group-level rules and the rules per (group, field)
+        """
+        if config is self._compiled_config:
+            return self._compiled_rule_index
 
-    def validate_data(self, data: dict, config: Dict) -> Tuple[bool, dict]:
-        """Validate worksheet data against configuration rules"""
         config_data = self._extract_validation_config(config)
         if not config_data:
             raise ValueError("No validation rules found in the configuration")
 
+        self._compiled_rule_index = RuleIndex(config_data, self._convert_rule_format)
+        self._compiled_config = config
+        return self._compiled_rule_index
+
+    def validate_data(self, data: dict, config: Union[Dict, RuleIndex]) -> Tuple[bool, dict]:
+        """Validate worksheet data against configuration rules (raw config or compiled RuleIndex)"""
+        rule_index = config if isinstance(config, RuleIndex) else self.compile_config(config)
+        return self._validate_document(data, rule_index)
+
+    def _validate_document(self, data: dict, rule_index: RuleIndex, precomputed: Dict = None,
+                           field_values: FieldValueTable = None) -> Tuple[bool, dict]:
+        """Validate one document, using the expression results already evaluated in batch mode if any"""
+        config_data = rule_index.config_data
+        if field_values is None:
+            field_values = self._create_field_value_table(data)
+
         all_valid = True
 
         # Initialize group-level exceptions at the top level
@@ -21,14 +57,13 @@ class ValidatorExecution:
             data["bre_exceptions"] = {}
 
         # First, handle group-level validations (where groups: [] is empty)
-        group_level_rules = self._find_validation_rules(config_data, is_group_level=True)
-        for rule in group_level_rules:
+        for rule in rule_index.group_level_rules:
             # For group-level validations, we validate against the entire data structure
             field_config = {
                 "validation_rules": [rule]
             }
             rule_errors = self.validation_engine.validate_field(
-                data, field_config, config_data, data, None, None
+                data, field_config, config_data, data, None, None, precomputed, field_values
             )
             if rule_errors:
                 all_valid = False
@@ -44,13 +79,8 @@ class ValidatorExecution:
             for field_name, field_data in fields.items():
                 field_value = field_data.get("value") if isinstance(field_data, dict) else field_data
 
-                # Get field-specific rules using the same function
-                field_rules = self._find_validation_rules(
-                    config_data,
-                    is_group_level=False,
-                    group_name=group_name,
-                    field_name=field_name
-                )
+                # Get field-specific rules from the pre-built index
+                field_rules = rule_index.get_field_rules(group_name, field_name)
 
                 if not field_rules:
                     continue
@@ -61,7 +91,8 @@ class ValidatorExecution:
 
                 try:
                     field_errors = self.validation_engine.validate_field(
-                        field_value, field_config, config_data, data, group_name, field_name
+                        field_value, field_config, config_data, data, group_name, field_name, precomputed,
+                        field_values
                     )
 
                     if field_errors:
@@ -73,55 +104,181 @@ class ValidatorExecution:
 
         return all_valid, data
 
-    def _extract_validation_config(self, config: Dict) -> list:
-        """Extract validation configuration from config"""
-        # The new structure has 'properties' as a list of validation rule groups
-        if 'properties' in config:
-            return config['properties']
-        # Fallback for backward compatibility - return empty list if no properties
-        return []
+    def revalidate(self, data: dict, changed_fields: Iterable[str], previous_result: dict,
+                   config: Union[Dict, RuleIndex]) -> Tuple[bool, dict]:
+        """
+        Re-validate a document after some fields changed, re-running only the rules that read them
 
-    def _find_validation_rules(self, config_data: list, is_group_level: bool = False,
-                               group_name: str = None, field_name: str = None) -> List[Dict]:
+        Args:
+            data: Document with the corrected values
+            changed_fields: References of the changed fields ('group.field')
+            previous_result: Validated data returned by validate_data for the previous version of the document
+            config: Validation configuration (raw config or compiled RuleIndex)
+
+        Returns:
+            Tuple of (is_valid, validated_data) as returned by validate_data. The bre_exceptions and
+            field message/pass state of the rules that were not re-run are taken from previous_result.
         """
-        Find validation rules based on the criteria:
-        - If is_group_level=True: Find rules where groups is empty or not present
-        - If is_group_level=False: Find rules for specific group.field.value pattern
+        rule_index = config if isinstance(config, RuleIndex) else self.compile_config(config)
+        config_data = rule_index.config_data
+        field_keys, group_level_rules = rule_index.get_dependent_rules(
+            tuple(field_ref.split(".")[:2]) for field_ref in changed_fields if "." in field_ref
+        )
+
+        # Start from the previous validation state, except for the fields whose rules are re-run:
+        # like validate_data, those keep their own message/pass unless a rule fails
+        data["bre_exceptions"] = dict(previous_result.get("bre_exceptions", {}))
+        previous_groups = previous_result.get("groups", {})
+        for group_name, group_data in data.get("groups", {}).items():
+            previous_fields = previous_groups.get(group_name, {}).get("fields", {})
+            for field_name, field_data in group_data.get("fields", {}).items():
+                previous_field = previous_fields.get(field_name)
+                if (group_name, field_name) in field_keys:
+                    continue
+                if isinstance(field_data, dict) and isinstance(previous_field, dict):
+                    for key in ("message", "pass"):
+                        if key in previous_field:
+                            field_data[key] = previous_field[key]
+        field_values = self._create_field_value_table(data)
+
+        # Re-run the group-level rules that read a changed field
+        for rule in group_level_rules:
+            rule_id = rule.get("id", "unknown_rule")
+            data["bre_exceptions"].pop(rule_id, None)
+            rule_errors = self.validation_engine.validate_field(
+                data, {"validation_rules": [rule]}, config_data, data, None, None, None, field_values
+            )
+            if rule_errors:
+                data["bre_exceptions"][rule_id] = "; ".join(rule_errors)
+
+        # Re-run all the rules of the fields that read a changed field
+        groups = data.get("groups", {})
+        rerun_failed = {}
+        for group_name, field_name in field_keys:
+            field_data = groups.get(group_name, {}).get("fields", {}).get(field_name)
+            if not isinstance(field_data, dict):
+                continue
+
+            try:
+                field_errors = self.validation_engine.validate_field(
+                    field_data.get("value"), {"validation_rules": rule_index.get_field_rules(group_name, field_name)},
+                    config_data, data, group_name, field_name, None, field_values
+                )
+            except Exception as e:
+                rerun_failed[(group_name, field_name)] = False
+                continue
+
+            rerun_failed[(group_name, field_name)] = bool(field_errors)
+            if field_errors:
+                field_data["message"] = "; ".join(field_errors)
+                field_data["pass"] = False
+
+        # The document is valid if no rule of the config has a failure recorded, re-run or not
+        all_valid = not any(rule.get("id", "unknown_rule") in data["bre_exceptions"]
+                            for rule in rule_index.group_level_rules)
+        for group_name, field_name in rule_index.field_rules:
+            if (group_name, field_name) in rerun_failed:
+                field_failed = rerun_failed[(group_name, field_name)]
+            else:
+                previous_field = previous_groups.get(group_name, {}).get("fields", {}).get(field_name)
+                field_failed = isinstance(previous_field, dict) and previous_field.get("pass") is False
+            if field_failed:
+                all_valid = False
+
+        return all_valid, data
+
+    def validate_batch(self, documents: Iterable[dict], config: Union[Dict, RuleIndex], workers: int = 1,
+                       chunk_size: int = 100, vectorize: bool = True) -> Iterator[Tuple[bool, dict]]:
+        """
+        Validate a stream of documents against the same configuration, compiling it only once
+
+        Args:
+            documents: Iterable of worksheet documents, consumed lazily
+            config: Validation configuration (raw config or compiled RuleIndex)
+            workers: Number of worker processes, 1 validates in the current process
+            chunk_size: Number of documents validated (and sent to a worker) at a time
+            vectorize: Evaluate numeric expressions column-wise over each chunk (requires numpy)
+
+        Returns:
+            Generator of (is_valid, validated_data) per document, in input order.
+            With workers > 1 the validated data is a copy returned by the worker process,
+            the input documents are not modified.
         """
-        found_rules = []
+        rule_index = config if isinstance(config, RuleIndex) else self.compile_config(config)
+        chunks = self._chunk_documents(documents, chunk_size)
 
-        for property_group in config_data:
-            validation_rules = property_group.get("validation_rules", [])
-            for rule in validation_rules:
+        if workers <= 1:
+            for chunk in chunks:
+                yield from self._validate_chunk(chunk, rule_index, vectorize)
+            return
 
-                if is_group_level:
-                    # Check if groups is empty or not present (indicating top-level validation)
-                    groups = rule.get("groups", [])
-                    if not groups:  # Empty list means it's a group-level validation
-                        converted_rule = self._convert_rule_format(rule)
-                        converted_rule["id"] = rule.get("id", "")  # Keep the id for group-level rules
-                        found_rules.append(converted_rule)
+        # Each worker compiles the config once, keep a bounded number of chunks in flight
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=({"properties": rule_index.config_data},)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_validate_chunk_in_worker, chunk, vectorize))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
 
-                else:
-                    # Field-level validation: look for rules that match group.field pattern
-                    rule_id = rule.get("id", "")
-                    target_pattern_prefix = f"{group_name}.{field_name}."
+    def _validate_chunk(self, chunk: List[dict], rule_index: RuleIndex,
+                        vectorize: bool = True) -> List[Tuple[bool, dict]]:
+        """Validate a chunk of documents against an already compiled configuration"""
+        field_values = [self._create_field_value_table(data) for data in chunk]
+        if vectorize and len(chunk) > 1 and self.vectorized_evaluator.is_available():
+            precomputed = self.vectorized_evaluator.precompute(chunk, rule_index, field_values)
+        else:
+            precomputed = [None] * len(chunk)
 
-                    # Match both .value and .consistency rules for the field
-                    if rule_id.startswith(target_pattern_prefix):
-                        converted_rule = self._convert_rule_format(rule)
-                        found_rules.append(converted_rule)
+        return [
+            self._validate_document(data, rule_index, results, values)
+            for data, results, values in zip(chunk, precomputed, field_values)
+        ]
 
-        return found_rules
+    def _create_field_value_table(self, data: dict) -> FieldValueTable:
+        """Create the table of normalized field values shared by all the rules validating a document"""
+        return FieldValueTable(data, self.validation_engine.expression_validator.load_field_value)
+
+    @staticmethod
+    def _chunk_documents(documents: Iterable[dict], chunk_size: int) -> Iterator[List[dict]]:
+        """Split a document stream into lists of at most chunk_size documents"""
+        iterator = iter(documents)
+        while chunk := list(islice(iterator, max(chunk_size, 1))):
+            yield chunk
+
+    def _extract_validation_config(self, config: Dict) -> list:
+        """Extract validation configuration from config"""
+        # The new structure has 'properties' as a list of validation rule groups
+        if 'properties' in config:
+            return config['properties']
+        # Fallback for backward compatibility - return empty list if no properties
+        return []
 
     def _convert_rule_format(self, rule: Dict) -> Dict:
-        """Convert rule from config format to validation engine format"""
-        return {
+        """Convert rule from config format to validation engine format, compiling its definitions"""
+        return self.validation_engine.compile_rule({
             "validation_type": rule.get("validation_type", ""),
             "regexes": rule.get("regexes", []),
             "expressions": rule.get("expressions", []),
             "error_msgs": rule.get("error_msgs", []),
             "conditionType": rule.get("conditionType", "AND")
-        }
+        })
+
+
+# Per-process state of the validate_batch workers, built once by the pool initializer
+_batch_execution = None
+_batch_rule_index = None
+
+
+def _init_batch_worker(config: Dict):
+    """Compile the configuration once in a validate_batch worker process"""
+    global _batch_execution, _batch_rule_index
+    _batch_execution = ValidatorExecution()
+    _batch_rule_index = _batch_execution.compile_config(config)
 
 
+def _validate_chunk_in_worker(chunk: List[dict], vectorize: bool) -> List[Tuple[bool, dict]]:
+    """Validate a chunk of documents in a validate_batch worker process"""
+    return _batch_execution._validate_chunk(chunk, _batch_rule_index, vectorize)
@@ -1,10 +1,23 @@
+import ast
+import math
 import re
 from datetime import datetime
-from typing import Any, Dict, Tuple
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
 from .base_validator import BaseValidator
+from ..core.compiled_expression import CompiledExpression
 from ..core.constants import ValidationConstants
+from ..core.field_value_table import FieldValue, FieldValueTable
+from ..core.vectorized_evaluator import VectorPlan
 from ..utils.math_utils import MathUtils
 
+# Tokens rewritten by the expression compiler: string literals (kept), field references and 'value'
+EXPRESSION_TOKEN_PATTERN = re.compile(
+    f"(?P<string>{ValidationConstants.STRING_LITERAL_PATTERN})"
+    f"|(?P<ref>{ValidationConstants.FIELD_REFERENCE_PATTERN})"
+    f"|{ValidationConstants.VALUE_REFERENCE_PATTERN}"
+)
+
 
 class ExpressionValidator(BaseValidator):
     """Validator for expression-based validation rules"""
@@ -12,6 +25,15 @@ class ExpressionValidator(BaseValidator):
     def __init__(self):
         """Initialize expression validator with math utilities"""
         self.math_utils = MathUtils()
+        self._compiled_cache = {}
+
+        # Safe evaluation with essential functions only
+        self._eval_globals = ValidationConstants.SAFE_EVAL_ALLOWED_NAMES.copy()
+        self._eval_globals.update({
+            "abs": self.math_utils.safe_abs,
+            "safe_subtract": self.math_utils.safe_subtract,
+            "date_is_future": self._date_is_future
+        })
 
     def validate(self, value: Any, rule: Dict, **kwargs) -> Tuple[bool, str]:
         """
@@ -21,7 +43,8 @@ class ExpressionValidator(BaseValidator):
 
     def validate_expression_list(self, field_value: Any, rule: Dict, config: Dict,
                                all_data: Dict = None, current_group: str = None,
-                               current_field: str = None) -> Tuple[bool, str]:
+                               current_field: str = None, precomputed: Dict = None,
+                               field_values: FieldValueTable = None) -> Tuple[bool, str]:
         """
         Validate using list of expressions with individual error messages
 
@@ -32,6 +55,8 @@ class ExpressionValidator(BaseValidator):
             all_data: All data for cross-field validation
             current_group: Current group name
             current_field: Current field name
+            precomputed: Results already evaluated in batch mode, keyed by (id(rule), expression position)
+            field_values: Normalized field values of the document, shared by all its rules
 
         Returns:
             Tuple of (is_valid: bool, error_message: str)
@@ -43,12 +68,16 @@ class ExpressionValidator(BaseValidator):
         if not expressions:
             raise ValueError(ValidationConstants.ERROR_MESSAGES["EXPRESSIONS_LIST_REQUIRED"])
 
+        # Expressions are compiled when the config is loaded, compile here for rules built elsewhere
+        compiled_expressions = rule.get("compiled_expressions") or self.compile_expressions(expressions)
+
         # Evaluate all expressions
         results = []
-        for i, expr in enumerate(expressions):
-            result = self._evaluate_direct_expression(
-                expr, field_value, all_data, current_group, current_field, config
-            )
+        for i, compiled in enumerate(compiled_expressions):
+            if precomputed and (id(rule), i) in precomputed:
+                result = precomputed[(id(rule), i)]
+            else:
+                result = self._evaluate_direct_expression(compiled, field_value, all_data, current_group, field_values)
             results.append(result)
 
             # If this expression failed and we have a specific error message for it
@@ -67,69 +96,163 @@ class ExpressionValidator(BaseValidator):
 
         return True, ""
 
-    def _evaluate_direct_expression(self, expression: str, field_value: Any, all_data: Dict,
-                                   current_group: str, current_field: str, config: Dict) -> bool:
+    def compile_expressions(self, expressions: List[Any]) -> List[CompiledExpression]:
+        """
+        Compile a rule's expressions, reusing the cached code object for repeated expressions
+
+        Args:
+            expressions: Expressions as written in validation_config
+
+        Returns:
+            List of compiled expressions, in the same order
+        """
+        compiled_expressions = []
+        for expression in expressions:
+            if not isinstance(expression, str):
+                compiled_expressions.append(self._compile_expression(expression))
+                continue
+
+            compiled = self._compiled_cache.get(expression)
+            if compiled is None:
+                compiled = self._compile_expression(expression)
+                self._compiled_cache[expression] = compiled
+            compiled_expressions.append(compiled)
+        return compiled_expressions
+
+    def _compile_expression(self, expression: Any) -> CompiledExpression:
         """
-        Evaluate direct Python expressions with field references
+        Rewrite field references and 'value' into variable slots and compile the result
 
         Args:
-            expression: The expression to evaluate
+            expression: The expression containing field references
+
+        Returns:
+            CompiledExpression (without code object if the expression does not compile)
+        """
+        if not isinstance(expression, str):
+            return CompiledExpression(expression, error=TypeError(
+                f"Expression must be a string, got {type(expression).__name__}: {expression}"))
+
+        if not expression.strip():
+            return CompiledExpression(expression, error=ValueError("Expression cannot be empty or whitespace only"))
+
+        slot_names = {}
+        slots = []
+
+        def to_slot(match):
+            # String literals are kept as written, references inside them are not replaced
+            if match.group("string") is not None:
+                return match.group(0)
+
+            field_ref = match.group("ref")
+            if field_ref not in slot_names:
+                slot_names[field_ref] = f"__ref{len(slots)}" if field_ref is not None else "__value"
+                slots.append((slot_names[field_ref], field_ref))
+            return slot_names[field_ref]
+
+        processed_expression = EXPRESSION_TOKEN_PATTERN.sub(to_slot, expression)
+
+        try:
+            tree = ast.parse(processed_expression, mode="eval")
+            code = compile(tree, "<validation_expression>", "eval")
+        except (SyntaxError, ValueError):
+            # Malformed rules evaluate to False, so validation can continue
+            return CompiledExpression(expression, None, slots)
+
+        return CompiledExpression(expression, code, slots,
+                                  vector_plan=VectorPlan.build(tree, [slot_name for slot_name, _ in slots]))
+
+    def _evaluate_direct_expression(self, compiled: CompiledExpression, field_value: Any, all_data: Dict,
+                                   current_group: str, field_values: FieldValueTable = None) -> bool:
+        """
+        Evaluate a compiled expression binding its field references to actual values
+
+        Args:
+            compiled: The compiled expression to evaluate
             field_value: Current field value
             all_data: All data for cross-field validation
             current_group: Current group name
-            current_field: Current field name
-            config: Global configuration
+            field_values: Normalized field values of the document
 
         Returns:
             Boolean result of expression evaluation
+
+        Raises:
+            Exception: If the expression definition itself is invalid (not a string or empty)
         """
-        # Replace field references with actual values
-        processed_expression = self._replace_field_references(
-            expression, field_value, all_data, current_group, current_field
-        )
+        if compiled.error is not None:
+            raise compiled.error
 
-        # Execute the processed expression
-        return self._execute_direct_expression(processed_expression)
+        if compiled.code is None:
+            return False
 
-    def _replace_field_references(self, expression: str, field_value: Any, all_data: Dict,
-                                 current_group: str, current_field: str) -> str:
+        try:
+            variables = dict(self._eval_globals)
+            variables.update(self.bind_slots(compiled, field_value, all_data, current_group, field_values))
+            return bool(eval(compiled.code, variables))
+        except Exception:
+            # For any evaluation errors (runtime, unsupported values, etc.), return False
+            # This allows validation to continue even with malformed rules
+            return False
+
+    def bind_slots(self, compiled: CompiledExpression, field_value: Any, all_data: Dict,
+                   current_group: str, field_values: FieldValueTable = None) -> Dict[str, Any]:
         """
-        Replace field references like 'mv1.value', 'bos.buyer_name' with actual values
+        Get the values bound to the variable slots of a compiled expression
 
         Args:
-            expression: The expression containing field references
+            compiled: The compiled expression
             field_value: Current field value
             all_data: All data for cross-field validation
             current_group: Current group name
-            current_field: Current field name
+            field_values: Normalized field values of the document, references are looked up directly otherwise
 
         Returns:
-            Processed expression with field references replaced
+            Dictionary of slot name to bound value
         """
-        processed_expression = expression
+        variables = {}
+        for slot_name, field_ref in compiled.slots:
+            if field_ref is None:
+                variables[slot_name] = self._bind_value(field_value)
+                continue
 
-        # Find all field references using regex pattern
-        field_refs = re.findall(ValidationConstants.FIELD_REFERENCE_PATTERN, expression)
+            entry = field_values.get(field_ref) if field_values is not None else None
+            if entry is None:
+                variables[slot_name] = self._bind_value(
+                    self._get_field_value_by_reference(field_ref, all_data, current_group))
+            elif entry.is_bound:
+                variables[slot_name] = entry.bound
+            else:
+                variables[slot_name] = self._bind_value(entry.raw)
+        return variables
 
-        for field_ref in field_refs:
-            # Skip malformed references that start with a dot
-            if field_ref.startswith('.'):
-                # Replace malformed reference with None
-                processed_expression = processed_expression.replace(field_ref, 'None')
-                continue
+    def load_field_value(self, all_data: Dict, field_ref: str) -> FieldValue:
+        """
+        Look up a field reference and normalize its value, once per document (see FieldValueTable)
 
-            actual_value = self._get_field_value_by_reference(field_ref, all_data, current_group)
-            formatted_value = self._format_value_for_direct_expression(actual_value)
-            processed_expression = processed_expression.replace(field_ref, formatted_value)
+        Args:
+            all_data: Document being validated
+            field_ref: Field reference string
 
-        # Replace standalone 'value' with current field value (only if not already replaced as part of a field reference)
-        if re.search(ValidationConstants.VALUE_REFERENCE_PATTERN, processed_expression):
-            processed_expression = re.sub(
-                ValidationConstants.VALUE_REFERENCE_PATTERN,
-                self._format_value_for_direct_expression(field_value),
-                processed_expression
-            )
-        return processed_expression
+        Returns:
+            FieldValue with the value bound to expression slots
+        """
+        raw_value = self._get_field_value_by_reference(field_ref, all_data)
+        cleaned = raw_value.strip() if isinstance(raw_value, str) else None
+        is_null = raw_value is None or cleaned == "" or cleaned in ValidationConstants.NULL_PLACEHOLDER_VALUES
+
+        decimal = None
+        if cleaned and not is_null:
+            try:
+                decimal = Decimal(cleaned)
+            except InvalidOperation:
+                pass
+
+        # Containers and non-finite numbers are converted on every use, the conversion may fail
+        if raw_value is None or isinstance(raw_value, (str, bool, int)) or \
+                (isinstance(raw_value, float) and math.isfinite(raw_value)):
+            return FieldValue(raw_value, cleaned, decimal, is_null, self._bind_value(raw_value))
+        return FieldValue(raw_value, cleaned, decimal, is_null)
 
     def _get_field_value_by_reference(self, field_ref: str, all_data: Dict, current_group: str = None) -> Any:
         """
@@ -168,79 +291,43 @@ class ExpressionValidator(BaseValidator):
 
         return current_data
 
-    def _format_value_for_direct_expression(self, value: Any) -> str:
+    def _bind_value(self, value: Any) -> Any:
         """
-        Format a value for use in direct expressions
+        Convert a field value into the Python value bound to an expression slot
 
         Args:
-            value: The value to format (accepts any type including string)
+            value: The raw field value (accepts any type including string)
 
         Returns:
-            Formatted string representation for expression evaluation
+            None for empty or placeholder values, the value itself otherwise
+
+        Raises:
+            ValueError: If a non-string value has no Python literal representation
         """
 
         # Handle None values
         if value is None:
-            return "None"
+            return None
 
         # Handle string values
         if isinstance(value, str):
-            # Handle empty strings
-            if value.strip() == "":
-                return "None"
-
-            # Handle placeholder values that should be treated as None (configurable)
-            if value.strip() in ValidationConstants.NULL_PLACEHOLDER_VALUES:
-                return "None"
-
-            # Escape quotes and wrap in quotes for valid string values
-            escaped_value = value.replace("'", "\\'").replace('"', '\\"')
-            return f'"{escaped_value}"'
-
-        # Handle other types (numbers, booleans, etc.)
-        return str(value)
-
-    def _execute_direct_expression(self, expression: str) -> bool:
-        """
-        Execute direct Python expression safely
-
-        Args:
-            expression: The Python expression to execute
-
-        Returns:
-            Boolean result of expression evaluation
+            # Handle empty strings and placeholder values that should be treated as None (configurable)
+            if value.strip() == "" or value.strip() in ValidationConstants.NULL_PLACEHOLDER_VALUES:
+                return None
+            return value
 
-                Raises:
-            Exception: If expression evaluation fails or if expression is not a string
-        """
-        # Validate that expression is a string
-        if not isinstance(expression, str):
-            raise TypeError(f"Expression must be a string, got {type(expression).__name__}: {expression}")
+        # Handle numbers and booleans
+        if isinstance(value, (bool, int)) or (isinstance(value, float) and math.isfinite(value)):
+            return value
 
-        if not expression.strip():
-            raise ValueError("Expression cannot be empty or whitespace only")
+        # Other types (Decimal, dicts, lists, etc.) are bound through their literal representation
+        return ast.literal_eval(str(value))
 
+    @staticmethod
+    def _date_is_future(date_str: Any) -> bool:
+        """Simple date comparison function"""
         try:
-            # Simple date comparison function
-            def date_is_future(date_str):
-                try:
-                    date_obj = datetime.strptime(date_str, "%m/%d/%Y")
-                    return date_obj.date() >= datetime.now().date()
-                except:
-                    return False
-
-            # Safe evaluation with essential functions only
-            allowed_names = ValidationConstants.SAFE_EVAL_ALLOWED_NAMES.copy()
-            allowed_names.update({
-                "abs": self.math_utils.safe_abs,
-                "safe_subtract": self.math_utils.safe_subtract,
-                "date_is_future": date_is_future
-            })
-
-            result = eval(expression, allowed_names, {})
-            return bool(result)
-        except Exception:
-            # For any evaluation errors (syntax, runtime, etc.), return False
-            # This allows validation to continue even with malformed rules
+            date_obj = datetime.strptime(date_str, ValidationConstants.DATE_FORMAT)
+            return date_obj.date() >= datetime.now().date()
+        except:
             return False
-
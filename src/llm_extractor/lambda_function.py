@@ -1,6 +1,8 @@
+import asyncio
 import json
 import os
 import boto3
+import time
 import traceback
 from datetime import datetime
 from botocore.exceptions import ClientError
@@ -9,13 +11,18 @@ from ..common.aria_helper.mongo_utils import Mongo
 from ..common.aria_helper.aria_utils import ARIA
 from ..common.extraction_engine.strategy.ocr.full_page_ocr_extraction_engine import FullPageOCRExtractionEngine
 from ..common.aria_helper.boto3_utils import get_secret, trigger_lambda
+from ..common.validation_helper.validation_execution import ValidatorExecution
 
 common_prefix = os.environ['COMMON_PREFIX']
-llm_secret = get_secret(f'{common_prefix}-llm_params')
 aria_environment = os.environ['ARIA_ENVIRONMENT']
 mongo_uri = get_secret(f'{common_prefix}-mongodb_uri', return_json=False).strip('"')
 aria_database = os.environ['ARIA_DATABASE']
 process_name = os.environ['PROCESS_NAME']
+async_extraction = os.environ.get('ASYNC_EXTRACTION', 'false').lower() == 'true'
+validation_config_ttl = int(os.environ.get('VALIDATION_CONFIG_TTL_SECONDS', 300))
+
+# Process-level state reused across warm invocations
+validation_rules_cache = {}  # app_id -> {"rule_index", "expires_at"}
 
 aria_secret = get_secret(secret_name=f'{common_prefix}-aria_cm_tokens')
 
@@ -74,6 +81,55 @@ def post_to_aria(bre_response, app_id, document_id):
         raise Exception(f"Failed to post to ARIA : {str(e)}")
 
 
+def get_validation_rules(mongo_client, app_id):
+    """Returns the compiled validation rules of the app, used by the verification triage (None if unavailable)"""
+    now = time.monotonic()
+    cached = validation_rules_cache.get(app_id)
+    if cached and now < cached["expires_at"]:
+        return cached["rule_index"]
+
+    rule_index = None
+    try:
+        validation_config = mongo_client.client[os.environ.get('DATABASE_NAME')]["validation_config"].find_one(
+            {"app_id": app_id})
+        if validation_config:
+            rule_index = ValidatorExecution().compile_config(validation_config)
+    except Exception as e:
+        print(f"WARNING: Could not load the validation rules of app {app_id}: {e}")
+    validation_rules_cache[app_id] = {"rule_index": rule_index, "expires_at": now + validation_config_ttl}
+    return rule_index
+
+
+async def extract_groups_async(extraction_engines, ocr_file, execution_id):
+    """Processes all the groups concurrently in one event loop, returning their results in extraction_engines order"""
+    async def extract_group(extraction_engine):
+        print(f'Processing group:{extraction_engine.group_name}')
+        await asyncio.to_thread(extraction_engine.get_ocr_data, ocr_file.get(extraction_engine.group_name, None) or '')
+        return await extraction_engine.process_data_async(False, execution_id)
+
+    try:
+        return await asyncio.gather(*(extract_group(extraction_engine) for extraction_engine in extraction_engines))
+    finally:
+        # Each asyncio.run has its own event loop, the LLM clients built for this one are closed with it
+        for extraction_engine in extraction_engines:
+            await extraction_engine.close_async_clients()
+
+
+def transform_unparsed_dates(extraction_engines, bre_input_json, wi_fields_json_clean):
+    """Sends the dates no engine could parse locally to the LLM, in a single call for the whole document"""
+    engines_with_dates = [engine for engine in extraction_engines if engine.unparsed_dates]
+    if not engines_with_dates:
+        return
+
+    transformed_dates = engines_with_dates[0].transform_dates(
+        {engine.group_name: engine.unparsed_dates for engine in engines_with_dates})
+    for engine in engines_with_dates:
+        group_dates = transformed_dates.get(engine.group_name, None)
+        if isinstance(group_dates, dict):
+            engine.merge_transformed_dates(bre_input_json['document']['groups'][engine.group_name]['fields'],
+                                           wi_fields_json_clean[engine.group_name], group_dates)
+
+
 def llm_extractor(event):
     body = event["body"]
     try:
@@ -94,6 +150,8 @@ def llm_extractor(event):
         ocr_file = body.get('words_coordinates', None)
         execution_id = body.get('execution_id', None)
         retrys = event.get('retrys')
+        # Set by operators reprocessing a work item, so the LLMs are asked again instead of the response cache
+        bypass_llm_cache = bool(body.get('bypass_llm_cache', False))
 
     except Exception as e:
         print('Bad request ({})'.format(e))
@@ -134,22 +192,35 @@ def llm_extractor(event):
 
         # Operations at group level
         wi_fields_json_clean = {}
-        for group_name in ocr_groups:
-            print(f'Processing group:{group_name}')
+        extraction_engines = []
+        rule_index = get_validation_rules(mongo_client, document.get('app_id', None))
+        if async_extraction:
+            extraction_engines = [FullPageOCRExtractionEngine(mongo_client, group_name, rule_index, bypass_llm_cache)
+                                  for group_name in ocr_groups]
+            group_results = asyncio.run(extract_groups_async(extraction_engines, ocr_file, execution_id))
+            for group_name, (bre_fields_json, extracted_data_clean) in zip(ocr_groups, group_results):
+                wi_fields_json_clean[group_name] = extracted_data_clean
+                bre_input_json['document']['groups'][group_name]['fields'].update(bre_fields_json)
+        else:
+            for group_name in ocr_groups:
+                print(f'Processing group:{group_name}')
 
-            extraction_engine = FullPageOCRExtractionEngine(mongo_client,group_name)
+                extraction_engine = FullPageOCRExtractionEngine(mongo_client, group_name, rule_index, bypass_llm_cache)
+                extraction_engines.append(extraction_engine)
 
-            # Downloading ocr data
-            link_to_download = ''
-            if ocr_file.get(group_name, None):
-                link_to_download = ocr_file.get(group_name, None)
-            extraction_engine.get_ocr_data(link_to_download)
+                # Downloading ocr data
+                link_to_download = ''
+                if ocr_file.get(group_name, None):
+                    link_to_download = ocr_file.get(group_name, None)
+                extraction_engine.get_ocr_data(link_to_download)
 
-            # Processing the document in blocks of pages (as per classification)
-            bre_fields_json, extracted_data_clean = extraction_engine.process_data(False, execution_id)
-            wi_fields_json_clean[group_name] = extracted_data_clean
-            bre_input_json['document']['groups'][group_name]['fields'].update(bre_fields_json)
+                # Processing the document in blocks of pages (as per classification)
+                bre_fields_json, extracted_data_clean = extraction_engine.process_data(False, execution_id)
+                wi_fields_json_clean[group_name] = extracted_data_clean
+                bre_input_json['document']['groups'][group_name]['fields'].update(bre_fields_json)
 
+        # Dates that could not be parsed locally, transformed by the LLM with one call per document
+        transform_unparsed_dates(extraction_engines, bre_input_json, wi_fields_json_clean)
 
         mongo_client.select_db_and_collection(db_name=os.environ.get('DATABASE_NAME'), collection_name=group_name)
         mongo_client.update_one(filter={"aria_wi_id": document['id']},